@@ -33,6 +33,7 @@ __version__ = '0.6.5'
 
 from .sht import RealSHT, InverseRealSHT, RealVectorSHT, InverseRealVectorSHT
 from .convolution import DiscreteContinuousConvS2, DiscreteContinuousConvTransposeS2
+from . import cache
 from . import quadrature
 from . import random_fields
 from . import examples
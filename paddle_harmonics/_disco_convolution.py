@@ -29,16 +29,21 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+from typing import Optional
+
+import numpy as np
 import paddle
 import triton
 import triton.language as tl
 
-from paddle_harmonics.utils import paddle_aux  # noqa
-
 BLOCK_SIZE_BATCH = 4
 BLOCK_SIZE_NZ = 8
 BLOCK_SIZE_POUT = 8
 
+# default memory budget in bytes for the gathered products of the reference contractions, which is
+# looked up whenever no budget is passed
+CONTRACTION_MEMORY_BUDGET = 2**28
+
 
 @triton.jit
 def _disco_s2_contraction_kernel(
@@ -365,11 +370,60 @@ def _disco_s2_transpose_contraction_triton(x: paddle.Tensor, psi: paddle.Tensor,
     return _DiscoS2TransposeContractionTriton.apply(x, psi, nlon_out)
 
 
-def _disco_s2_contraction_paddle(x: paddle.Tensor, psi: paddle.Tensor, nlon_out: int):
+def _contraction_memory_budget(memory_budget: Optional[int] = None):
+    """
+    Resolves the memory budget of the reference contractions, where None refers to the current value
+    of CONTRACTION_MEMORY_BUDGET.
+    """
+    return CONTRACTION_MEMORY_BUDGET if memory_budget is None else memory_budget
+
+
+def _longitude_tile_size(nnz: int, n_cols: int, nlon: int, element_size: int, memory_budget: int):
+    """
+    Determines the number of longitudes processed at once, such that the gathered products of a tile
+    of shape nnz x tile_size x n_cols fit into the memory budget given in bytes.
+    """
+    return max(1, min(nlon, memory_budget // max(1, nnz * n_cols * element_size)))
+
+
+def _precompute_contraction_indices(
+    psi: paddle.Tensor, nlon_in: int, nlon_out: int, tile_size: int
+):
+    """
+    Splits the non-zero entries of psi into rows of the output and computes their shifted column
+    indices into the input for each tile of tile_size output longitudes.
+    """
+    nlat_out = psi.shape[1]
+    pscale = nlon_in // nlon_out
+
+    inz = psi.indices()
+    rows = inz[0] * nlat_out + inz[1]
+    tnz = inz[2] // nlon_in
+    pnz = inz[2] % nlon_in
+
+    cols = []
+    for pstart in range(0, nlon_out, tile_size):
+        pout = paddle.arange(pstart, min(pstart + tile_size, nlon_out), dtype=inz.dtype)
+        cols.append(tnz.unsqueeze(-1) * nlon_in + (pnz.unsqueeze(-1) + pout * pscale) % nlon_in)
+
+    return rows, cols
+
+
+def _disco_s2_contraction_paddle(
+    x: paddle.Tensor,
+    psi: paddle.Tensor,
+    nlon_out: int,
+    memory_budget: Optional[int] = None,
+    indices=None,
+):
     """
-    Reference implementation of the custom contraction as described in [1]. This requires repeated
-    shifting of the input tensor, which can potentially be costly. For an efficient implementation
-    on GPU, make sure to use the custom kernel written in Triton.
+    Reference implementation of the custom contraction as described in [1]. Instead of shifting the
+    input tensor, the shifted column indices of psi are computed for a tile of output longitudes, such
+    that the products with the input are formed by a single gather. Psi is never densified and the
+    tiles are chosen to fit into memory_budget bytes, which defaults to CONTRACTION_MEMORY_BUDGET.
+    The indices may be precomputed with _precompute_contraction_indices, in which case their tiles are
+    used instead. For an efficient implementation on GPU, make sure to use the custom kernel written
+    in Triton.
     """
     assert len(psi.shape) == 3
     assert len(x.shape) == 4
@@ -381,31 +435,77 @@ def _disco_s2_contraction_paddle(x: paddle.Tensor, psi: paddle.Tensor, nlon_out:
     assert psi.shape[-1] == nlat_in * nlon_in
     assert nlon_in % nlon_out == 0
     assert nlon_in >= nlat_out
-    pscale = nlon_in // nlon_out
 
-    # add a dummy dimension for nkernel and move the batch and channel dims to the end
-    x = x.reshape(1, batch_size * n_chans, nlat_in, nlon_in).transpose([0, 2, 3, 1])
-    x = x.expand(shape=[kernel_size, -1, -1, -1])
+    # move the batch and channel dims to the end
+    x = x.reshape(batch_size * n_chans, nlat_in * nlon_in).transpose([1, 0])
 
-    y = paddle.zeros(shape=[nlon_out, kernel_size, nlat_out, batch_size * n_chans], dtype=x.dtype)
-
-    for pout in range(nlon_out):
-        # sparse contraction with psi
-        y[pout] = paddle_aux.bmm_fix(psi, x.reshape(kernel_size, nlat_in * nlon_in, -1))
-        # we need to repeatedly roll the input tensor to faciliate the shifted multiplication
-        x = paddle.roll(x, -pscale, axis=2)
+    if indices is None:
+        tile_size = _longitude_tile_size(
+            psi.nnz(),
+            batch_size * n_chans,
+            nlon_out,
+            x.element_size(),
+            _contraction_memory_budget(memory_budget),
+        )
+        indices = _precompute_contraction_indices(psi, nlon_in, nlon_out, tile_size)
+    rows, cols = indices
+    vals = psi.values().astype(x.dtype).reshape([-1, 1, 1])
+
+    # gathered sparse-dense products of each tile, accumulated into the output rows
+    y = []
+    for tcols in cols:
+        ytile = vals * paddle.gather(x, tcols.flatten()).reshape([*tcols.shape, -1])
+        y.append(
+            paddle.zeros([kernel_size * nlat_out, *ytile.shape[1:]], dtype=x.dtype).index_add(
+                rows, 0, ytile
+            )
+        )
+    y = paddle.concat(y, axis=1)
 
     # reshape y back to expose the correct dimensions
-    y = y.transpose([3, 1, 2, 0]).reshape(batch_size, n_chans, kernel_size, nlat_out, nlon_out)
+    y = y.reshape(kernel_size, nlat_out, nlon_out, -1).transpose([3, 0, 1, 2])
+    y = y.reshape(batch_size, n_chans, kernel_size, nlat_out, nlon_out)
 
     return y
 
 
-def _disco_s2_transpose_contraction_paddle(x: paddle.Tensor, psi: paddle.Tensor, nlon_out: int):
+def _precompute_transpose_indices(psi: paddle.Tensor, nlon_in: int, nlon_out: int, tile_size: int):
+    """
+    Computes the indices of the non-zero entries of psi into the input and their shifted column
+    indices into the output for each tile of tile_size input longitudes.
+    """
+    nlat_in = psi.shape[1]
+    pscale = nlon_out // nlon_in
+
+    inz = psi.indices()
+    rows = inz[0] * nlat_in + inz[1]
+    tnz = inz[2] // nlon_out
+    pnz = inz[2] % nlon_out
+
+    indices = []
+    for pstart in range(0, nlon_in, tile_size):
+        pin = paddle.arange(pstart, min(pstart + tile_size, nlon_in), dtype=inz.dtype)
+        xcols = rows.unsqueeze(-1) * nlon_in + pin
+        cols = tnz.unsqueeze(-1) * nlon_out + (pnz.unsqueeze(-1) + pin * pscale) % nlon_out
+        indices.append((xcols, cols.flatten()))
+
+    return indices
+
+
+def _disco_s2_transpose_contraction_paddle(
+    x: paddle.Tensor,
+    psi: paddle.Tensor,
+    nlon_out: int,
+    memory_budget: Optional[int] = None,
+    indices=None,
+):
     """
-    Reference implementation of the custom contraction as described in [1]. This requires repeated
-    shifting of the input tensor, which can potentially be costly. For an efficient implementation
-    on GPU, make sure to use the custom kernel written in Triton.
+    Reference implementation of the custom transpose contraction as described in [1], which is the
+    adjoint of the contraction. The products of psi with a tile of input longitudes are scattered onto
+    the shifted output columns, where the tiles are chosen to fit into memory_budget bytes, which
+    defaults to CONTRACTION_MEMORY_BUDGET. The indices may be precomputed with
+    _precompute_transpose_indices, in which case their tiles are used instead. For an
+    efficient implementation on GPU, make sure to use the custom kernel written in Triton.
     """
     assert len(psi.shape) == 3
     assert len(x.shape) == 5
@@ -418,42 +518,125 @@ def _disco_s2_transpose_contraction_paddle(x: paddle.Tensor, psi: paddle.Tensor,
     assert n_out % nlon_out == 0
     nlat_out = n_out // nlon_out
     assert nlon_out >= nlat_in
-    pscale = nlon_out // nlon_in
 
-    # we do a semi-transposition to faciliate the computation
-    inz = psi.indices()
-    tout = inz[2] // nlon_out
-    pout = inz[2] % nlon_out
-    # flip the axis of longitudes
-    pout = nlon_out - 1 - pout
-    tin = inz[1]
-    inz = paddle.stack([inz[0], tout, tin * nlon_out + pout], axis=0)
-    psi_mod = paddle.sparse.sparse_coo_tensor(
-        inz, psi.values(), shape=(kernel_size, nlat_out, nlat_in * nlon_out)
-    )
+    # move the batch and channel dims to the end
+    x = x.reshape(batch_size * n_chans, kernel_size * nlat_in * nlon_in).transpose([1, 0])
 
-    # interleave zeros along the longitude dimension to allow for fractional offsets to be considered
-    x_ext = paddle.zeros(
-        shape=[kernel_size, nlat_in, nlon_out, batch_size * n_chans], dtype=x.dtype
-    )
-    x_ext[:, :, ::pscale, :] = x.reshape(
-        batch_size * n_chans, kernel_size, nlat_in, nlon_in
-    ).transpose([1, 2, 3, 0])
-    # we need to go backwards through the vector, so we flip the axis
-    x_ext = x_ext.contiguous()
-
-    y = paddle.zeros(shape=[kernel_size, nlon_out, nlat_out, batch_size * n_chans], dtype=x.dtype)
-
-    for pout in range(nlon_out):
-        # we need to repeatedly roll the input tensor to faciliate the shifted multiplication
-        # TODO: double-check why this has to happen first
-        x_ext = paddle.roll(x_ext, -1, axis=2)
-        # sparse contraction with the modified psi
-        y[:, pout, :, :] = paddle_aux.bmm_fix(
-            psi_mod, x_ext.reshape(kernel_size, nlat_in * nlon_out, -1)
+    if indices is None:
+        tile_size = _longitude_tile_size(
+            psi.nnz(),
+            batch_size * n_chans,
+            nlon_in,
+            x.element_size(),
+            _contraction_memory_budget(memory_budget),
         )
+        indices = _precompute_transpose_indices(psi, nlon_in, nlon_out, tile_size)
+    vals = psi.values().astype(x.dtype).reshape([-1, 1, 1])
+
+    y = paddle.zeros([nlat_out * nlon_out, batch_size * n_chans], dtype=x.dtype)
+    for xcols, cols in indices:
+        # gathered sparse-dense product for the tile of input longitudes
+        ytile = vals * paddle.gather(x, xcols.flatten()).reshape([*xcols.shape, -1])
 
-    # sum over the kernel dimension and reshape to the correct output size
-    y = y.sum(axis=0).transpose([2, 1, 0]).reshape(batch_size, n_chans, nlat_out, nlon_out)
+        # scatter onto the shifted output columns
+        y = y.index_add(cols, 0, ytile.reshape([-1, ytile.shape[-1]]))
+
+    # reshape to the correct output size
+    y = y.transpose([1, 0]).reshape(batch_size, n_chans, nlat_out, nlon_out)
 
     return y
+
+
+def _precompute_psi_fft(psi: paddle.Tensor, nlon: int):
+    """
+    Precomputes the spectra of the longitudinal filter rows of psi for the FFT-based contraction.
+
+    Psi is expected as a sparse tensor of shape kernel_size x n_rows x (nlat * nlon). For each row, the
+    non-zero entries are confined to a band of latitudes, which is gathered into a dense filter of
+    shape kernel_size x n_rows x band_size x nlon and transformed along longitude.
+
+    Returns the filter spectra and the latitude index of each band entry of shape n_rows x band_size.
+    """
+
+    kernel_size, n_rows, n_cols = psi.shape
+    nlat = n_cols // nlon
+
+    idx = psi.indices().numpy()
+    vals = psi.values().numpy()
+    k, r, lat, lon = idx[0], idx[1], idx[2] // nlon, idx[2] % nlon
+
+    # determine the band of latitudes covered by each row
+    band_start = np.full(n_rows, nlat)
+    np.minimum.at(band_start, r, lat)
+    band_stop = np.zeros(n_rows, dtype=np.int64)
+    np.maximum.at(band_stop, r, lat + 1)
+    band_size = max(int(np.max(band_stop - np.minimum(band_start, band_stop), initial=1)), 1)
+    band_start = np.clip(band_start, 0, nlat - band_size)
+
+    filters = np.zeros((kernel_size, n_rows, band_size, nlon), dtype=vals.dtype)
+    np.add.at(filters, (k, r, lat - band_start[r], lon), vals)
+
+    psi_fft = paddle.fft.rfft(paddle.to_tensor(filters), axis=-1)
+    band = paddle.to_tensor(band_start.reshape(-1, 1) + np.arange(band_size), dtype="int64")
+
+    return psi_fft, band
+
+
+def _disco_s2_contraction_fft(
+    x: paddle.Tensor, psi_fft: paddle.Tensor, band: paddle.Tensor, nlon_out: int
+):
+    """
+    FFT-based implementation of the DISCO contraction. The shifted products along longitude are a
+    circular cross-correlation of the input with the filter rows of psi, which is computed by
+    multiplication in the Fourier domain. The stride pscale is applied by subsampling the result.
+    """
+    assert len(x.shape) == 4
+
+    batch_size, n_chans, nlat_in, nlon_in = x.shape
+    kernel_size, nlat_out, band_size, _ = psi_fft.shape
+
+    assert nlon_in % nlon_out == 0
+    pscale = nlon_in // nlon_out
+
+    # gather the band of input latitudes for each output latitude
+    x = paddle.fft.rfft(x, axis=-1)
+    x = x[:, :, band.flatten()].reshape(batch_size, n_chans, nlat_out, band_size, -1)
+
+    # correlate along longitude and sum over the band of input latitudes
+    y = paddle.einsum("bctwm,ktwm->bcktm", x, psi_fft.conj())
+    y = paddle.fft.irfft(y, n=nlon_in, axis=-1)
+
+    return y[..., ::pscale]
+
+
+def _disco_s2_transpose_contraction_fft(
+    x: paddle.Tensor, psi_fft: paddle.Tensor, band: paddle.Tensor, nlat_out: int, nlon_out: int
+):
+    """
+    FFT-based implementation of the transpose DISCO contraction, which is the adjoint of the
+    FFT-based contraction. The input is upsampled by inserting zeros, convolved with the filter rows
+    of psi in the Fourier domain and accumulated onto the band of output latitudes.
+    """
+    assert len(x.shape) == 5
+
+    batch_size, n_chans, kernel_size, nlat_in, nlon_in = x.shape
+    _, _, band_size, _ = psi_fft.shape
+
+    assert nlon_out % nlon_in == 0
+    pscale = nlon_out // nlon_in
+
+    # interleave zeros along the longitude dimension to account for the stride
+    x_ext = paddle.zeros(shape=[batch_size, n_chans, kernel_size, nlat_in, nlon_out], dtype=x.dtype)
+    x_ext[..., ::pscale] = x
+    x_ext = paddle.fft.rfft(x_ext, axis=-1)
+
+    # convolve along longitude and sum over the kernel dimension
+    y = paddle.einsum("bcktm,ktwm->bctwm", x_ext, psi_fft)
+    y = y.reshape(batch_size, n_chans, nlat_in * band_size, -1)
+
+    # accumulate the contributions onto the output latitudes
+    y = paddle.zeros([batch_size, n_chans, nlat_out, y.shape[-1], 2], dtype=x.dtype).index_add(
+        band.flatten(), 2, paddle.as_real(y)
+    )
+
+    return paddle.fft.irfft(paddle.as_complex(y), n=nlon_out, axis=-1)
@@ -0,0 +1,324 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import numpy as np
+import paddle
+
+
+def _is_equatorially_symmetric(cost, w, tol=1e-12):
+    """
+    Checks whether the quadrature nodes cost and weights w are mirror symmetric about the equator.
+    """
+    return np.allclose(cost, -np.flip(cost), rtol=0.0, atol=tol) and np.allclose(
+        w, np.flip(w), rtol=0.0, atol=tol * np.abs(w).max()
+    )
+
+
+def _split_parity(weights: paddle.Tensor):
+    """
+    Splits the Legendre weights of shape mmax x lmax x nlat into the contributions of even and odd
+    degree l, keeping only the northern hemisphere (including the equator for odd nlat). The
+    remaining latitudes are recovered from the symmetry P^m_l(-x) = (-1)^(l+m) P^m_l(x).
+    """
+    nhalf = (weights.shape[-1] + 1) // 2
+    weights_even = weights[:, 0::2, :nhalf].contiguous()
+    weights_odd = weights[:, 1::2, :nhalf].contiguous()
+    return weights_even, weights_odd
+
+
+def _parity_sign(mmax: int, dtype="float64"):
+    """
+    Returns the sign (-1)^m in a shape broadcastable against tensors of shape ... x mmax x 2.
+    """
+    sign = 1.0 - 2.0 * (np.arange(mmax) % 2)
+    return paddle.to_tensor(sign, dtype=dtype).reshape([mmax, 1])
+
+
+def _fold_hemispheres(x: paddle.Tensor, sign: paddle.Tensor):
+    """
+    Folds a (real-valued view of) Fourier-transformed signal of shape ... x nlat x mmax x 2 into the
+    northern hemisphere. Returns the combinations that pair with even and odd degrees l respectively,
+    which are the symmetric and antisymmetric parts for even m and vice versa for odd m.
+    """
+    nlat = x.shape[-3]
+    nhalf = (nlat + 1) // 2
+
+    xn = x[..., :nhalf, :, :]
+    xs = paddle.flip(x[..., nhalf:, :, :], axis=[-3])
+    if nlat % 2 == 1:
+        # the equator only appears once
+        pad_shape = list(xs.shape)
+        pad_shape[-3] = 1
+        xs = paddle.concat([xs, paddle.zeros(pad_shape, dtype=xs.dtype)], axis=-3)
+
+    xs = sign.astype(x.dtype) * xs
+    return xn + xs, xn - xs
+
+
+def _unfold_hemispheres(xe: paddle.Tensor, xo: paddle.Tensor, sign: paddle.Tensor, nlat: int):
+    """
+    Inverse operation to _fold_hemispheres. Takes the northern hemisphere contributions of even and
+    odd degrees l and assembles the signal of shape ... x nlat x mmax x 2 on the full sphere.
+    """
+    xn = xe + xo
+    xs = sign.astype(xe.dtype) * (xe - xo)
+    xs = paddle.flip(xs[..., : nlat // 2, :, :], axis=[-3])
+    return paddle.concat([xn, xs], axis=-3)
+
+
+def _interleave_parity(xe: paddle.Tensor, xo: paddle.Tensor, lmax: int):
+    """
+    Interleaves coefficients of even and odd degree of shape ... x ceil(lmax/2) x mmax x 2 and
+    ... x floor(lmax/2) x mmax x 2 into a tensor of shape ... x lmax x mmax x 2.
+    """
+    if xo.shape[-3] < xe.shape[-3]:
+        pad_shape = list(xo.shape)
+        pad_shape[-3] = 1
+        xo = paddle.concat([xo, paddle.zeros(pad_shape, dtype=xo.dtype)], axis=-3)
+
+    out_shape = list(xe.shape)
+    out_shape[-3] = 2 * xe.shape[-3]
+    x = paddle.stack([xe, xo], axis=-3).reshape(out_shape)
+    return x[..., :lmax, :, :]
+
+
+# number of consecutive orders m which are grouped into one block of the triangular contraction
+MBLOCK_SIZE = 16
+
+
+def _triangular_blocks(weights: paddle.Tensor, mblock: int = MBLOCK_SIZE, threshold=None):
+    """
+    Splits Legendre weights of shape [d x] mmax x lmax x nlat into blocks of mblock consecutive orders
+    m. Each block only retains the degrees l starting from the first one which is non-zero for any m
+    in the block, such that the structural zeros l < m are neither stored nor multiplied. If a
+    threshold is given, each block is further restricted to the band of latitudes k0 <= k < k1 where
+    the weights exceed threshold times their maximum magnitude for that order (polar optimization).
+    Returns a list of tuples (m0, m1, l0, k0, k1, block), where block is None if all entries vanish.
+    """
+    mmax, lmax, nlat = weights.shape[-3], weights.shape[-2], weights.shape[-1]
+
+    # find the first non-zero degree for each order
+    absw = np.abs(weights.numpy())
+    if absw.ndim == 4:
+        absw = absw.max(axis=0)
+    nonzero = (absw != 0.0).any(axis=-1)
+    lstart = np.where(nonzero.any(axis=-1), nonzero.argmax(axis=-1), lmax)
+
+    # find the latitudes where each order is significant
+    if threshold is not None:
+        wmax = absw.max(axis=(-2, -1), keepdims=True)
+        significant = (absw >= threshold * wmax).any(axis=-2) & (wmax[..., 0] > 0.0)
+    else:
+        significant = np.ones((mmax, nlat), dtype=bool)
+
+    blocks = []
+    for m0 in range(0, mmax, mblock):
+        m1 = min(m0 + mblock, mmax)
+        l0 = int(lstart[m0:m1].min())
+        band = significant[m0:m1].any(axis=0)
+        k0 = int(band.argmax())
+        k1 = int(nlat - band[::-1].argmax())
+        if l0 < lmax and band.any():
+            block = weights[..., m0:m1, l0:, k0:k1].contiguous()
+        else:
+            block = None
+        blocks.append((m0, m1, l0, k0, k1, block))
+
+    return blocks
+
+
+def _polar_truncation_error(weight_blocks):
+    """
+    Estimates the relative error of a polar optimized contraction as the relative Frobenius norm of the
+    Legendre weights which are discarded. Takes a list of pairs of weights and the blocks built from them.
+    """
+    dropped = 0.0
+    total = 0.0
+    for weights, blocks in weight_blocks:
+        w = weights.numpy()
+        mask = np.ones(w.shape, dtype=bool)
+        for m0, m1, l0, k0, k1, block in blocks:
+            if block is not None:
+                mask[..., m0:m1, l0:, k0:k1] = False
+        dropped += np.sum(w[mask] ** 2)
+        total += np.sum(w**2)
+    return float(np.sqrt(dropped / total)) if total > 0.0 else 0.0
+
+
+def _polar_blocks(weights: paddle.Tensor, threshold=None):
+    """
+    Builds the (optionally polar optimized) triangular blocks and returns them together with the
+    estimated relative error of the truncation.
+    """
+    blocks = _triangular_blocks(weights, threshold=threshold)
+    return blocks, _polar_truncation_error([(weights, blocks)])
+
+
+def _blocked_legendre_contraction(x: paddle.Tensor, blocks, lmax: int):
+    """
+    Contracts a (real-valued view of) signal of shape ... x nlat x mmax x 2 over the latitudes with
+    Legendre weights stored in triangular blocks, yielding coefficients of shape ... x lmax x mmax x 2.
+    """
+    out = []
+    for m0, m1, l0, k0, k1, w in blocks:
+        if w is not None:
+            xb = paddle.einsum("...kmr,mlk->...lmr", x[..., k0:k1, m0:m1, :], w.astype(x.dtype))
+        if l0 > 0 or w is None:
+            # pad the vanishing degrees
+            nz = l0 if w is not None else lmax
+            xz = paddle.zeros(x.shape[:-3] + [nz, m1 - m0, x.shape[-1]], dtype=x.dtype)
+            xb = paddle.concat([xz, xb], axis=-3) if w is not None else xz
+        out.append(xb)
+
+    return paddle.concat(out, axis=-2)
+
+
+def _blocked_legendre_expansion(x: paddle.Tensor, blocks, nlat: int):
+    """
+    Evaluates (a real-valued view of) coefficients of shape ... x lmax x mmax x 2 on the latitudes using
+    Legendre weights stored in triangular blocks, yielding a tensor of shape ... x nlat x mmax x 2.
+    """
+    out = []
+    for m0, m1, l0, k0, k1, w in blocks:
+        if w is not None:
+            xb = paddle.einsum("...lmr,mlk->...kmr", x[..., l0:, m0:m1, :], w.astype(x.dtype))
+            if k0 > 0 or k1 < nlat:
+                # pad the skipped polar latitudes
+                xn = paddle.zeros(x.shape[:-3] + [k0, m1 - m0, x.shape[-1]], dtype=x.dtype)
+                xs = paddle.zeros(x.shape[:-3] + [nlat - k1, m1 - m0, x.shape[-1]], dtype=x.dtype)
+                xb = paddle.concat([xn, xb, xs], axis=-3)
+        else:
+            xb = paddle.zeros(x.shape[:-3] + [nlat, m1 - m0, x.shape[-1]], dtype=x.dtype)
+        out.append(xb)
+
+    return paddle.concat(out, axis=-2)
+
+
+def _select_component(blocks, d: int):
+    """
+    Selects the component d of vector Legendre weights stored in triangular blocks.
+    """
+    return [
+        (m0, m1, l0, k0, k1, w[d] if w is not None else None) for m0, m1, l0, k0, k1, w in blocks
+    ]
+
+
+def _combine_vector_components(x0: paddle.Tensor, x1: paddle.Tensor):
+    """
+    Combines the contractions x0 = W0 x and x1 = W1 x of a (real-valued view of) vector field of shape
+    ... x 2 x n x mmax x 2 with the two components of the vector Legendre weights into the spheroidal
+    and toroidal components s = x0_0 + i x1_1 and t = i x1_0 - x0_1 of the result.
+    """
+    srl = x0[..., 0, :, :, 0] - x1[..., 1, :, :, 1]
+    sim = x0[..., 0, :, :, 1] + x1[..., 1, :, :, 0]
+    trl = -x1[..., 0, :, :, 1] - x0[..., 1, :, :, 0]
+    tim = x1[..., 0, :, :, 0] - x0[..., 1, :, :, 1]
+
+    s = paddle.stack((srl, sim), -1)
+    t = paddle.stack((trl, tim), -1)
+    return paddle.stack((s, t), -4)
+
+
+def _combine_vector_components_adjoint(x: paddle.Tensor):
+    """
+    Adjoint of _combine_vector_components. Splits a (real-valued view of) tensor of shape
+    ... x 2 x n x mmax x 2 into the contributions x0 = (s, -t) and x1 = (-i t, -i s) which are
+    contracted with the two components of the vector Legendre weights.
+    """
+    s, t = x[..., 0, :, :, :], x[..., 1, :, :, :]
+    x0 = paddle.stack((s, -t), -4)
+    mit = paddle.stack((t[..., 1], -t[..., 0]), -1)
+    mis = paddle.stack((s[..., 1], -s[..., 0]), -1)
+    x1 = paddle.stack((mit, mis), -4)
+    return x0, x1
+
+
+def _legendre_blocks(weights: paddle.Tensor, triangular: bool = False, threshold=None):
+    """
+    Returns the blocks used to store the Legendre weights, which is either the triangular blocking
+    (optionally polar optimized) or a single dense block.
+    """
+    if triangular or threshold is not None:
+        return _triangular_blocks(weights, threshold=threshold)
+    return [(0, weights.shape[-3], 0, 0, weights.shape[-1], weights)]
+
+
+def _register_blocks(layer: paddle.nn.Layer, name: str, blocks):
+    """
+    Registers the weights of a blocked Legendre contraction as non-persistable buffers of the layer.
+    """
+    meta = []
+    for i, (*extent, w) in enumerate(blocks):
+        if w is not None:
+            layer.register_buffer(f"{name}_{i}", w, persistable=False)
+        meta.append(tuple(extent))
+    setattr(layer, f"_{name}_blocks", meta)
+
+
+def _get_blocks(layer: paddle.nn.Layer, name: str, dtype=None):
+    """
+    Retrieves the blocks registered with _register_blocks, optionally cast to dtype.
+    """
+    meta = getattr(layer, f"_{name}_blocks")
+    blocks = []
+    for i, extent in enumerate(meta):
+        w = None
+        if hasattr(layer, f"{name}_{i}"):
+            w = (
+                _cast_buffer(layer, f"{name}_{i}", dtype)
+                if dtype is not None
+                else getattr(layer, f"{name}_{i}")
+            )
+        blocks.append((*extent, w))
+    return blocks
+
+
+def _cast_buffer(layer: paddle.nn.Layer, name: str, dtype):
+    """
+    Returns the buffer name of the layer cast to dtype. Casts are cached on the layer, such that the
+    weights are not converted on every call, and recomputed whenever the buffer is moved, cast or
+    modified in place.
+    """
+    w = getattr(layer, name)
+    if w.dtype == dtype:
+        return w
+
+    cast_cache = getattr(layer, "_cast_cache", None)
+    if cast_cache is None:
+        cast_cache = layer._cast_cache = {}
+
+    version = (w.data_ptr(), str(w.place), w._inplace_version())
+    entry = cast_cache.get((name, dtype))
+    if entry is None or entry[0] != version:
+        with paddle.no_grad():
+            entry = (version, w.astype(dtype))
+        cast_cache[(name, dtype)] = entry
+    return entry[1]
@@ -0,0 +1,159 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import math
+
+import numpy as np
+import paddle
+
+LCHUNK_SIZE = 16
+
+
+def _legendre_recursion_coeffs(mmax, lmax, x, norm="ortho", inverse=False, csphase=True):
+    """
+    Precomputes everything needed to regenerate the values of (-1)^m c^l_m P^l_m(x) computed by
+    legendre.legpoly degree by degree, using only O(mmax * len(x)) memory. Returns the diagonal
+    seeds P^m_m(x) of shape mmax x nlat, the three-term recursion coefficients a and b of shape
+    lmax x mmax, the normalization of each degree and the Condon-Shortley phase of each order.
+    """
+    norm_factor = 1.0 if norm == "ortho" else np.sqrt(4 * np.pi)
+    norm_factor = 1.0 / norm_factor if inverse else norm_factor
+
+    # the diagonal P^m_m
+    diag = np.zeros((mmax, len(x)), dtype=np.float64)
+    diag[0] = norm_factor / np.sqrt(4 * np.pi)
+    for m in range(1, mmax):
+        diag[m] = np.sqrt((2 * m + 1) * (1 + x) * (1 - x) / 2 / m) * diag[m - 1]
+
+    # coefficients of the three-term recursion, which only applies to m < l-1
+    l, m = np.meshgrid(np.arange(lmax), np.arange(mmax), indexing="ij")
+    valid = m < l - 1
+    # evaluate the invalid entries at l=2, m=0 to avoid spurious divisions by zero
+    l = np.where(valid, l, 2)
+    m = np.where(valid, m, 0)
+    a = np.sqrt((2 * l - 1) / (l - m) * (2 * l + 1) / (l + m))
+    b = np.sqrt((l + m - 1) / (l - m) * (2 * l + 1) / (2 * l - 3) * (l - m - 1) / (l + m))
+    a = np.where(valid, a, 0.0)
+    b = np.where(valid, b, 0.0)
+
+    lscale = np.ones(lmax, dtype=np.float64)
+    if norm == "schmidt":
+        lscale = np.sqrt(2 * np.arange(lmax) + 1)
+        lscale = lscale if inverse else 1.0 / lscale
+
+    msign = np.ones(mmax, dtype=np.float64)
+    if csphase:
+        msign[1::2] = -1.0
+
+    return diag, a, b, lscale, msign
+
+
+def _legendre_chunks(x, diag, a, b, lscale, msign, lchunk=LCHUNK_SIZE):
+    """
+    Generator which advances the recursion along the degree l and yields (l0, pct) with pct the
+    Legendre values of the degrees l0 <= l < l0 + lchunk in the layout lchunk x mmax x nlat.
+    """
+    lmax, mmax = a.shape
+
+    p1 = paddle.zeros_like(diag)
+    p2 = paddle.zeros_like(diag)
+    chunk = []
+    for l in range(lmax):
+        p = x * a[l].reshape([mmax, 1]) * p1 - b[l].reshape([mmax, 1]) * p2
+
+        # start the recursion from the diagonal and the first off-diagonal
+        if l < mmax:
+            p[l] = diag[l]
+        if 0 < l <= mmax:
+            p[l - 1] = math.sqrt(2 * l + 1) * x * diag[l - 1]
+
+        chunk.append(p)
+        p1, p2 = p, p1
+
+        if len(chunk) == lchunk or l == lmax - 1:
+            l0 = l + 1 - len(chunk)
+            pct = paddle.stack(chunk, axis=0) * lscale[l0 : l + 1].reshape([-1, 1, 1])
+            yield l0, pct * msign.reshape([1, mmax, 1])
+            chunk = []
+
+
+def _register_recursion(layer, x, norm, inverse, csphase, w=None):
+    """
+    Registers the buffers used to regenerate the Legendre values on the fly during the forward pass.
+    As the recursion is linear, quadrature weights w are folded into the diagonal seeds.
+    """
+    diag, a, b, lscale, msign = _legendre_recursion_coeffs(
+        layer.mmax, layer.lmax, x, norm=norm, inverse=inverse, csphase=csphase
+    )
+    if w is not None:
+        diag = diag * w
+    layer.register_buffer("legendre_x", paddle.to_tensor(x.copy()), persistable=False)
+    layer.register_buffer("legendre_diag", paddle.to_tensor(diag), persistable=False)
+    layer.register_buffer("legendre_a", paddle.to_tensor(a), persistable=False)
+    layer.register_buffer("legendre_b", paddle.to_tensor(b), persistable=False)
+    layer.register_buffer("legendre_lscale", paddle.to_tensor(lscale), persistable=False)
+    layer.register_buffer("legendre_msign", paddle.to_tensor(msign), persistable=False)
+
+
+def _get_chunks(layer, lchunk=LCHUNK_SIZE):
+    return _legendre_chunks(
+        layer.legendre_x,
+        layer.legendre_diag,
+        layer.legendre_a,
+        layer.legendre_b,
+        layer.legendre_lscale,
+        layer.legendre_msign,
+        lchunk=lchunk,
+    )
+
+
+def _on_the_fly_legendre_contraction(x: paddle.Tensor, chunks):
+    """
+    Contracts a (real-valued view of) signal of shape ... x nlat x mmax x 2 with the Legendre values
+    generated chunk by chunk, returning the coefficients of shape ... x lmax x mmax x 2.
+    """
+    xout = []
+    for _, pct in chunks:
+        xout.append(paddle.einsum("...kmr,lmk->...lmr", x, pct.astype(x.dtype)))
+    return paddle.concat(xout, axis=-3)
+
+
+def _on_the_fly_legendre_expansion(x: paddle.Tensor, chunks):
+    """
+    Evaluates the (real-valued view of) coefficients of shape ... x lmax x mmax x 2 on the grid with
+    the Legendre values generated chunk by chunk, returning a tensor of shape ... x nlat x mmax x 2.
+    """
+    xout = 0.0
+    for l0, pct in chunks:
+        l1 = l0 + pct.shape[0]
+        xout = xout + paddle.einsum("...lmr,lmk->...kmr", x[..., l0:l1, :, :], pct.astype(x.dtype))
+    return xout
@@ -0,0 +1,102 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+import math
+
+import paddle
+import paddle.fft
+
+
+class _LinearTransform(paddle.autograd.PyLayer):
+    """
+    Applies a linear transform and computes its gradient by applying the adjoint transform, such that
+    no activations need to be stored for the backward pass
+    """
+
+    @staticmethod
+    def forward(ctx, x: paddle.Tensor, transform, adjoint):
+        ctx.adjoint = adjoint
+        return transform(x)
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        return ctx.adjoint(grad_output)
+
+
+def _apply_linear_transform(x: paddle.Tensor, transform, adjoint):
+    """
+    Applies transform to x, using adjoint for the backward pass if gradients are required.
+    """
+    if x.stop_gradient or not paddle.is_grad_enabled():
+        return transform(x)
+    return _LinearTransform.apply(x, transform, adjoint)
+
+
+def _interior_modes(nmodes: int, nlon: int, dtype):
+    """
+    Returns a mask of shape nmodes x 1 which is 1 for the Fourier modes 0 < m < (nlon + 1) // 2 that
+    appear twice in a real signal of length nlon, and 0 otherwise.
+    """
+    m = paddle.arange(nmodes).reshape([nmodes, 1])
+    return ((m > 0) & (m < (nlon + 1) // 2)).astype(dtype)
+
+
+def _rfft_adjoint(x: paddle.Tensor, nlon: int):
+    """
+    Adjoint of the forward Fourier transform x -> 2 pi rfft(x, norm="forward")[..., :mmax] used by the
+    forward SHTs, applied to a (real-valued view of) tensor of shape ... x mmax x 2.
+    """
+    nfreq = nlon // 2 + 1
+    x = x[..., :nfreq, :]
+    if x.shape[-2] < nfreq:
+        pad = paddle.zeros(x.shape[:-2] + [nfreq - x.shape[-2], 2], dtype=x.dtype)
+        x = paddle.concat([x, pad], axis=-2)
+
+    # the irfft counts the interior modes twice, which the forward transform only does once
+    x = x * (1.0 - 0.5 * _interior_modes(nfreq, nlon, x.dtype))
+    return 2.0 * math.pi * paddle.fft.irfft(paddle.as_complex(x), n=nlon, axis=-1, norm="backward")
+
+
+def _irfft_adjoint(x: paddle.Tensor, mmax: int):
+    """
+    Adjoint of the inverse Fourier transform z -> irfft(z, n=nlon, norm="forward") used by the inverse
+    SHTs for inputs with mmax modes. Returns a real-valued view of shape ... x mmax x 2.
+    """
+    nlon = x.shape[-1]
+    x = paddle.as_real(paddle.fft.rfft(x, axis=-1, norm="backward"))
+    x = x * (1.0 + _interior_modes(x.shape[-2], nlon, x.dtype))
+
+    x = x[..., :mmax, :]
+    if x.shape[-2] < mmax:
+        pad = paddle.zeros(x.shape[:-2] + [mmax - x.shape[-2], 2], dtype=x.dtype)
+        x = paddle.concat([x, pad], axis=-2)
+    return x
@@ -0,0 +1,307 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from functools import partial
+
+import numpy as np
+import paddle
+
+# revision of the precomputation algorithms and the on-disk format. It has to be incremented whenever
+# a change alters the values of persistent entries without a change of the library version.
+CACHE_REVISION = 2
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "entries", "nbytes", "max_bytes"]
+)
+
+
+def _nbytes(value):
+    """
+    Computes the memory footprint of a cached value, which may be a tensor, an array or a (nested)
+    tuple or list thereof.
+    """
+    if isinstance(value, paddle.Tensor):
+        return int(np.prod(value.shape)) * value.element_size()
+    elif isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+def _share(value):
+    """
+    Hands out a cached value. Tensors are returned as new views onto the cached memory, such that
+    moving or casting the buffers of one layer does not affect the cache or other layers. Arrays are
+    returned as read-only views.
+    """
+    if isinstance(value, paddle.Tensor):
+        return value.view(value.shape)
+    elif isinstance(value, np.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+        return value
+    elif isinstance(value, (tuple, list)):
+        return type(value)(_share(v) for v in value)
+    return value
+
+
+class PrecomputeCache:
+    """
+    Process-wide, thread-safe cache for precomputed tensors such as quadrature rules and Legendre
+    weights. Entries are evicted in least-recently-used order once their total size exceeds max_bytes.
+    Cached tensors share their memory between all layers using them and have to be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=2**31):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+        # locks of the keys which are currently being computed
+        self._pending = {}
+
+    def get_or_compute(self, key, compute_fn):
+        """
+        Returns the value stored under key, calling compute_fn to create it if it is not cached yet.
+        compute_fn is called without holding the lock of the cache, such that a slow precomputation
+        only blocks lookups of the same key, which wait for its result instead of computing it again.
+        """
+        with self._lock:
+            if key in self._entries:
+                return self._hit(key)
+            key_lock = self._pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # another thread may have computed the value in the meantime
+                if key in self._entries:
+                    return self._hit(key)
+                self._misses += 1
+
+            try:
+                value = compute_fn()
+                nbytes = _nbytes(value)
+
+                # values which exceed the budget on their own are not cached
+                with self._lock:
+                    if nbytes <= self.max_bytes:
+                        self._entries[key] = (value, nbytes)
+                        self._nbytes += nbytes
+                        self._evict()
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+        return _share(value)
+
+    def _hit(self, key):
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return _share(self._entries[key][0])
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+            self._evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self._nbytes,
+                self.max_bytes,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+def _encode(value, leaves):
+    """
+    Splits a cached value into its array leaves and a json-serializable description of its structure.
+    """
+    if isinstance(value, paddle.Tensor):
+        leaves.append(value.numpy())
+        return {"tensor": len(leaves) - 1}
+    elif isinstance(value, np.ndarray):
+        leaves.append(value)
+        return {"array": len(leaves) - 1}
+    elif isinstance(value, tuple):
+        return {"tuple": [_encode(v, leaves) for v in value]}
+    elif isinstance(value, list):
+        return {"list": [_encode(v, leaves) for v in value]}
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return {"value": value}
+    raise TypeError(f"Cannot store values of type {type(value)} in the on-disk cache")
+
+
+def _decode(spec, path):
+    """
+    Reassembles a value from its description, memory-mapping the array leaves stored in path.
+    """
+    if "tensor" in spec:
+        # copy-on-write mapping, such that the tensor wraps the mapped file without a copy
+        leaf = np.load(os.path.join(path, f"{spec['tensor']}.npy"), mmap_mode="c")
+        try:
+            return paddle.utils.dlpack.from_dlpack(leaf)
+        except (BufferError, TypeError, RuntimeError):
+            return paddle.to_tensor(leaf)
+    elif "array" in spec:
+        return np.load(os.path.join(path, f"{spec['array']}.npy"), mmap_mode="r")
+    elif "tuple" in spec:
+        return tuple(_decode(s, path) for s in spec["tuple"])
+    elif "list" in spec:
+        return [_decode(s, path) for s in spec["list"]]
+    return spec["value"]
+
+
+def _cache_path(cache_dir, key):
+    """
+    Location of the on-disk entry for key. Entries are keyed by a hash of the configuration, the
+    library version and the cache revision, such that upgrading the library never picks up stale tensors.
+    """
+    from paddle_harmonics import __version__
+
+    digest = hashlib.sha256(repr((__version__, CACHE_REVISION, key)).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest)
+
+
+def _load_or_compute(cache_dir, key, compute_fn):
+    """
+    Loads the entry for key from cache_dir or computes and stores it. Entries are written to a
+    temporary directory first and renamed into place, such that concurrent processes sharing the
+    cache directory never observe partially written entries.
+    """
+    path = _cache_path(cache_dir, key)
+    manifest = os.path.join(path, "manifest.json")
+
+    if os.path.isfile(manifest):
+        with open(manifest, "r") as f:
+            entry = json.load(f)
+        if entry["key"] == repr(key):
+            return _decode(entry["spec"], path)
+
+    value = compute_fn()
+
+    leaves = []
+    spec = _encode(value, leaves)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", dir=cache_dir)
+    try:
+        for i, leaf in enumerate(leaves):
+            np.save(os.path.join(tmp_path, f"{i}.npy"), leaf)
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump({"key": repr(key), "spec": spec}, f)
+        os.rename(tmp_path, path)
+    except OSError:
+        # another process has stored the same entry in the meantime
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return value
+
+
+_precompute_cache = PrecomputeCache()
+_cache_dir = os.environ.get("PADDLE_HARMONICS_CACHE_DIR")
+
+
+def cached(key, compute_fn, persistent=False):
+    r"""
+    Looks up key in the process-wide precomputation cache and calls compute_fn on a miss. Persistent
+    entries are additionally stored in and reloaded from the on-disk cache directory, if one is set.
+    """
+    if persistent and _cache_dir is not None:
+        compute_fn = partial(_load_or_compute, _cache_dir, key, compute_fn)
+    return _precompute_cache.get_or_compute(key, compute_fn)
+
+
+def set_cache_dir(cache_dir):
+    r"""
+    Sets the directory of the on-disk precomputation cache. The default is taken from the environment
+    variable PADDLE_HARMONICS_CACHE_DIR. Passing None disables the on-disk cache.
+    """
+    global _cache_dir
+    _cache_dir = None if cache_dir is None else os.fspath(cache_dir)
+
+
+def get_cache_dir():
+    r"""
+    Returns the directory of the on-disk precomputation cache or None if it is disabled.
+    """
+    return _cache_dir
+
+
+def set_cache_budget(max_bytes):
+    r"""
+    Sets the maximum number of bytes held by the process-wide precomputation cache, evicting the
+    least recently used entries if necessary. A budget of 0 disables caching.
+    """
+    _precompute_cache.set_max_bytes(max_bytes)
+
+
+def cache_info():
+    r"""
+    Returns hits, misses, evictions, number of entries, size in bytes and budget of the process-wide
+    precomputation cache.
+    """
+    return _precompute_cache.info()
+
+
+def clear_cache():
+    r"""
+    Drops all entries of the process-wide precomputation cache and resets its statistics.
+    """
+    _precompute_cache.clear()
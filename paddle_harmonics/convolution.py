@@ -41,26 +41,45 @@ import numpy as np
 import paddle
 import paddle.nn as nn
 
+from paddle_harmonics._disco_convolution import _contraction_memory_budget
+from paddle_harmonics._disco_convolution import _disco_s2_contraction_fft
 from paddle_harmonics._disco_convolution import _disco_s2_contraction_paddle
 from paddle_harmonics._disco_convolution import _disco_s2_contraction_triton
+from paddle_harmonics._disco_convolution import _disco_s2_transpose_contraction_fft
 from paddle_harmonics._disco_convolution import _disco_s2_transpose_contraction_paddle
 from paddle_harmonics._disco_convolution import _disco_s2_transpose_contraction_triton
+from paddle_harmonics._disco_convolution import _longitude_tile_size
+from paddle_harmonics._disco_convolution import _precompute_contraction_indices
+from paddle_harmonics._disco_convolution import _precompute_psi_fft
+from paddle_harmonics._disco_convolution import _precompute_transpose_indices
+from paddle_harmonics.cache import cached
 from paddle_harmonics.quadrature import _precompute_grid  # noqa
 from paddle_harmonics.quadrature import _precompute_latitudes
 from paddle_harmonics.utils import paddle_aux  # noqa
 
+# maximum number of elements in the support mask evaluated at once during the precomputation
+_PRECOMPUTE_BLOCK_ELEMENTS = 2**24
+
+
+def _drop_kernel_index(iidx: paddle.Tensor):
+    """
+    Removes the kernel column (third from last) from an index set returned by paddle.nonzero.
+    """
+    return paddle.concat([iidx[:, :-3], iidx[:, -2:]], axis=1)
+
 
 def _compute_support_vals_isotropic(
     r: paddle.Tensor, phi: paddle.Tensor, nr: int, r_cutoff: float, norm: str = "s2"
 ):
     """
     Computes the index set that falls into the isotropic kernel's support and returns both indices and values.
+    Leading dimensions of r and phi are kept in the index set, followed by the kernel index.
     """
 
     # compute the support
     dr = (r_cutoff - 0.0) / nr
     ikernel = paddle.arange(nr).reshape(-1, 1, 1)
-    ir = ikernel * dr
+    ir = ikernel.astype(r.dtype) * dr
 
     if norm == "none":
         norm_factor = 1.0
@@ -84,8 +103,10 @@ def _compute_support_vals_isotropic(
         raise ValueError(f"Unknown normalization mode {norm}.")
 
     # find the indices where the rotated position falls into the support of the kernel
-    iidx = paddle.nonzero(((r - ir).abs() <= dr) & (r <= r_cutoff))
-    vals = (1 - (r[iidx[:, 1], iidx[:, 2]] - ir[iidx[:, 0], 0, 0]).abs() / dr) / norm_factor
+    rk = r.unsqueeze(-3)
+    iidx = paddle.nonzero(((rk - ir).abs() <= dr) & (rk <= r_cutoff))
+    r_nz = paddle.gather_nd(r, _drop_kernel_index(iidx))
+    vals = (1 - (r_nz - ir.flatten()[iidx[:, -3]]).abs() / dr) / norm_factor
     return iidx, vals
 
 
@@ -94,6 +115,7 @@ def _compute_support_vals_anisotropic(
 ):
     """
     Computes the index set that falls into the anisotropic kernel's support and returns both indices and values.
+    Leading dimensions of r and phi are kept in the index set, followed by the kernel index.
     """
 
     # compute the support
@@ -101,8 +123,8 @@ def _compute_support_vals_anisotropic(
     dphi = 2.0 * math.pi / nphi
     kernel_size = (nr - 1) * nphi + 1
     ikernel = paddle.arange(kernel_size).reshape(-1, 1, 1)
-    ir = ((ikernel - 1) // nphi + 1) * dr
-    iphi = ((ikernel - 1) % nphi) * dphi
+    ir = ((ikernel - 1) // nphi + 1).astype(r.dtype) * dr
+    iphi = ((ikernel - 1) % nphi).astype(phi.dtype) * dphi
 
     if norm == "none":
         norm_factor = 1.0
@@ -126,26 +148,30 @@ def _compute_support_vals_anisotropic(
         raise ValueError(f"Unknown normalization mode {norm}.")
 
     # find the indices where the rotated position falls into the support of the kernel
-    cond_r = ((r - ir).abs() <= dr) & (r <= r_cutoff)
+    rk = r.unsqueeze(-3)
+    phik = phi.unsqueeze(-3)
+    cond_r = ((rk - ir).abs() <= dr) & (rk <= r_cutoff)
     cond_phi = (
-        (ikernel == 0) | ((phi - iphi).abs() <= dphi) | ((2 * math.pi - (phi - iphi).abs()) <= dphi)
+        (ikernel == 0)
+        | ((phik - iphi).abs() <= dphi)
+        | ((2 * math.pi - (phik - iphi).abs()) <= dphi)
     )
     iidx = paddle.nonzero(cond_r & cond_phi)
-    vals = (1 - (r[iidx[:, 1], iidx[:, 2]] - ir[iidx[:, 0], 0, 0]).abs() / dr) / norm_factor
+    ridx = _drop_kernel_index(iidx)
+    r_nz = paddle.gather_nd(r, ridx)
+    phi_nz = paddle.gather_nd(phi, ridx)
+    ir_nz = ir.flatten()[iidx[:, -3]]
+    iphi_nz = iphi.flatten()[iidx[:, -3]]
+    vals = (1 - (r_nz - ir_nz).abs() / dr) / norm_factor
     vals *= paddle.where(
-        iidx[:, 0] > 0,
+        iidx[:, -3] > 0,
         (
             1
-            - paddle.minimum(
-                (phi[iidx[:, 1], iidx[:, 2]] - iphi[iidx[:, 0], 0, 0]).abs(),
-                (2 * math.pi - (phi[iidx[:, 1], iidx[:, 2]] - iphi[iidx[:, 0], 0, 0]).abs()),
-            )
+            - paddle.minimum((phi_nz - iphi_nz).abs(), (2 * math.pi - (phi_nz - iphi_nz).abs()))
             / dphi
         ),
-        1.0,
-    ).astype(
-        vals.dtype
-    )  # 202411: add astype
+        paddle.ones_like(phi_nz),
+    ).astype(vals.dtype)
     return iidx, vals
 
 
@@ -156,11 +182,13 @@ def _precompute_convolution_tensor_s2(
     grid_in="equiangular",
     grid_out="equiangular",
     theta_cutoff=0.01 * math.pi,
+    north_only=False,
 ):
     """
     Precomputes the rotated filters at positions $R^{-1}_j \omega_i = R^{-1}_j R_i \nu = Y(-\theta_j)Z(\phi_i - \phi_j)Y(\theta_j)\nu$.
     Assumes a tensorized grid on the sphere with an equidistant sampling in longitude as described in Ocampo et al.
-    The output tensor has shape kernel_shape x nlat_out x (nlat_in * nlon_in).
+    The output tensor has shape kernel_shape x nlat_out x (nlat_in * nlon_in). If north_only is set, only the
+    (nlat_out + 1) // 2 output latitudes of the northern hemisphere, including the equator, are computed.
 
     The rotation of the Euler angles uses the YZY convention, which applied to the northpole $(0,0,1)^T$ yields
     $$
@@ -180,6 +208,7 @@ def _precompute_convolution_tensor_s2(
         kernel_handle = partial(
             _compute_support_vals_isotropic, nr=kernel_shape[0], r_cutoff=theta_cutoff, norm="s2"
         )
+        kernel_size = kernel_shape[0]
     elif len(kernel_shape) == 2:
         kernel_handle = partial(
             _compute_support_vals_anisotropic,
@@ -188,6 +217,7 @@ def _precompute_convolution_tensor_s2(
             r_cutoff=theta_cutoff,
             norm="s2",
         )
+        kernel_size = (kernel_shape[0] - 1) * kernel_shape[1] + 1
     else:
         raise ValueError("kernel_shape should be either one- or two-dimensional.")
 
@@ -195,34 +225,54 @@ def _precompute_convolution_tensor_s2(
     nlat_out, nlon_out = out_shape
 
     lats_in, _ = _precompute_latitudes(nlat_in, grid=grid_in)
-    lats_in = paddle.to_tensor(lats_in).astype(dtype="float32")
     lats_out, _ = _precompute_latitudes(nlat_out, grid=grid_out)
-    lats_out = paddle.to_tensor(lats_out).astype(dtype="float32")
-
-    # array for accumulating non-zero indices
-    out_idx = paddle.empty([3, 0], dtype="int64")
-    out_vals = paddle.empty([0], dtype="int64")
+    if north_only:
+        lats_out = lats_out[: (nlat_out + 1) // 2]
+        nlat_out = len(lats_out)
+
+    # the geodesic distance is bounded from below by the difference in colatitude, such that only a band of
+    # input latitudes can fall into the support. The band is padded by one latitude to be safe against roundoff.
+    band_start = np.searchsorted(lats_in, lats_out - theta_cutoff, side="left") - 1
+    band_stop = np.searchsorted(lats_in, lats_out + theta_cutoff, side="right") + 1
+    band_size = min(int(np.max(band_stop - band_start)), nlat_in)
+    band_start = paddle.to_tensor(np.clip(band_start, 0, nlat_in - band_size), dtype="int64")
+    band = band_start.reshape([-1, 1]) + paddle.arange(band_size, dtype="int64")
+
+    # the geometry is computed in double precision, as arccos is ill-conditioned close to the kernel center
+    lats_in = paddle.to_tensor(lats_in, dtype="float64")
+    lats_out = paddle.to_tensor(lats_out, dtype="float64")
 
     # compute the phi differences
     # It's imporatant to not include the 2 pi point in the longitudes, as it is equivalent to lon=0
-    lons_in = paddle.linspace(0, 2 * math.pi, nlon_in + 1)[:-1]
+    lons_in = paddle.linspace(0, 2 * math.pi, nlon_in + 1, dtype="float64")[:-1]
+
+    # the trigonometric functions of the input grid are shared by all output latitudes
+    cos_beta, sin_beta = paddle.cos(lons_in), paddle.sin(lons_in)
+    cos_gamma, sin_gamma = paddle.cos(lats_in), paddle.sin(lats_in)
+
+    # process the output latitudes in blocks to bound the size of the support mask
+    block_size = max(1, _PRECOMPUTE_BLOCK_ELEMENTS // (kernel_size * band_size * nlon_in))
+
+    # non-zero indices and values of each block, assembled once at the end
+    out_idx = []
+    out_vals = []
 
-    for t in range(nlat_out):
+    for t0 in range(0, nlat_out, block_size):
         # the last angle has a negative sign as it is a passive rotation, which rotates the filter around the y-axis
-        alpha = -lats_out[t]
-        beta = lons_in
-        gamma = lats_in.reshape(-1, 1)
+        alpha = -lats_out[t0 : t0 + block_size].reshape([-1, 1, 1])
+        cos_alpha, sin_alpha = paddle.cos(alpha), paddle.sin(alpha)
+
+        # gather the band of input latitudes for each output latitude in the block
+        block_band = band[t0 : t0 + block_size]
+        cos_gamma_band = cos_gamma[block_band].unsqueeze(-1)
+        sin_gamma_band = sin_gamma[block_band].unsqueeze(-1)
 
         # compute cartesian coordinates of the rotated position
         # This uses the YZY convention of Euler angles, where the last angle (alpha) is a passive rotation,
         # and therefore applied with a negative sign
-        z = -paddle.cos(beta) * paddle.sin(alpha) * paddle.sin(gamma) + paddle.cos(
-            alpha
-        ) * paddle.cos(gamma)
-        x = paddle.cos(alpha) * paddle.cos(beta) * paddle.sin(gamma) + paddle.cos(
-            gamma
-        ) * paddle.sin(alpha)
-        y = paddle.sin(beta) * paddle.sin(gamma)
+        z = -cos_beta * sin_alpha * sin_gamma_band + cos_alpha * cos_gamma_band
+        x = cos_alpha * cos_beta * sin_gamma_band + cos_gamma_band * sin_alpha
+        y = sin_beta * sin_gamma_band
 
         # normalization is emportant to avoid NaNs when arccos and atan are applied
         # this can otherwise lead to spurious artifacts in the solution
@@ -231,6 +281,9 @@ def _precompute_convolution_tensor_s2(
         y = y / norm
         z = z / norm
 
+        # roundoff can still push z out of [-1, 1] at coinciding grid points
+        z = paddle.clip(z, -1.0, 1.0)
+
         # compute spherical coordinates, where phi needs to fall into the [0, 2pi) range
         theta = paddle.acos(z)
         phi = paddle.atan2(y, x) + np.pi
@@ -240,17 +293,107 @@ def _precompute_convolution_tensor_s2(
 
         # add the output latitude and reshape such that psi has dimensions kernel_shape x nlat_out x (nlat_in*nlon_in)
         idx = paddle.stack(
-            [iidx[:, 0], t * paddle.ones_like(iidx[:, 0]), iidx[:, 1] * nlon_in + iidx[:, 2]],
+            [
+                iidx[:, 1],
+                iidx[:, 0] + t0,
+                block_band[iidx[:, 0], iidx[:, 2]] * nlon_in + iidx[:, 3],
+            ],
             axis=0,
         )
 
-        # append indices and values to the COO datastructure
-        out_idx = paddle.concat([out_idx, idx], axis=-1)
-        out_vals = paddle.concat([out_vals, vals], axis=-1)
+        out_idx.append(idx)
+        out_vals.append(vals.astype("float32"))
+
+    # assemble the COO datastructure in a single pass over the blocks
+    out_idx = paddle.concat(out_idx, axis=-1)
+    out_vals = paddle.concat(out_vals, axis=-1)
 
     return out_idx, out_vals
 
 
+def _cached_convolution_tensor_s2(
+    in_shape,
+    out_shape,
+    kernel_shape,
+    grid_in="equiangular",
+    grid_out="equiangular",
+    theta_cutoff=0.01 * math.pi,
+    north_only=False,
+):
+    """
+    Looks up the convolution tensor in the precomputation cache, such that layers with the same
+    configuration share a single copy and runs with an on-disk cache directory reuse it.
+    """
+    key = (
+        "convolution_tensor_s2",
+        tuple(in_shape),
+        tuple(out_shape),
+        tuple(kernel_shape),
+        grid_in,
+        grid_out,
+        float(theta_cutoff),
+        north_only,
+    )
+    compute_fn = partial(
+        _precompute_convolution_tensor_s2,
+        in_shape,
+        out_shape,
+        kernel_shape,
+        grid_in=grid_in,
+        grid_out=grid_out,
+        theta_cutoff=theta_cutoff,
+        north_only=north_only,
+    )
+    return cached(key, compute_fn, persistent=True)
+
+
+def _hemispheric_kernel_permutation(
+    kernel_shape, nlat_in, nlat_out, grid_in="equiangular", grid_out="equiangular"
+):
+    """
+    Checks whether the convolution tensor is symmetric under reflection at the equator and returns the
+    permutation of kernel indices induced by the reflection, or None otherwise.
+
+    Reflecting both the input and the output latitude maps the rotated position (theta, phi) to
+    (theta, pi - phi). Hence, psi[k, nlat_out - 1 - t, nlat_in - 1 - i, j] = psi[perm[k], t, i, j], which
+    requires symmetric grids and, for anisotropic kernels, an even number of angular kernel functions.
+    """
+
+    for nlat, grid in [(nlat_in, grid_in), (nlat_out, grid_out)]:
+        lats, _ = _precompute_latitudes(nlat, grid=grid)
+        if not np.allclose(lats + lats[::-1], np.pi):
+            return None
+
+    if len(kernel_shape) == 1:
+        return np.arange(kernel_shape[0])
+
+    nr, nphi = kernel_shape
+    if nphi % 2 != 0:
+        return None
+
+    iphi = np.arange(nphi)
+    perm = ((nphi // 2 - iphi) % nphi).reshape(1, -1) + nphi * np.arange(nr - 1).reshape(-1, 1)
+    return np.concatenate([[0], 1 + perm.flatten()])
+
+
+def _reflect_convolution_tensor_s2(idx, vals, kernel_perm, nlat_out, nlat_in, nlon_in):
+    """
+    Completes the northern rows of the convolution tensor with the reflected southern rows.
+    """
+
+    kernel_perm = paddle.to_tensor(kernel_perm, dtype="int64")
+
+    # the equator is already part of the northern rows
+    mask = idx[1] < nlat_out // 2
+    k, t, ij = idx[0][mask], idx[1][mask], idx[2][mask]
+    i, j = ij // nlon_in, ij % nlon_in
+
+    south_idx = paddle.stack(
+        [kernel_perm[k], nlat_out - 1 - t, (nlat_in - 1 - i) * nlon_in + j], axis=0
+    )
+    return paddle.concat([idx, south_idx], axis=-1), paddle.concat([vals, vals[mask]], axis=-1)
+
+
 def _precompute_convolution_tensor_2d(
     grid_in, grid_out, kernel_shape, radius_cutoff=0.01, periodic=False
 ):
@@ -376,12 +519,20 @@ class DiscreteContinuousConvS2(DiscreteContinuousConv):
         grid_out: Optional[str] = "equiangular",
         bias: Optional[bool] = True,
         theta_cutoff: Optional[float] = None,
+        contraction: Optional[str] = "sparse",
+        memory_budget: Optional[int] = None,
     ):
         super().__init__(in_channels, out_channels, kernel_shape, groups, bias)
 
         self.nlat_in, self.nlon_in = in_shape
         self.nlat_out, self.nlon_out = out_shape
 
+        if contraction not in ["sparse", "fft"]:
+            raise ValueError(f"Unknown contraction {contraction}.")
+        self.contraction = contraction
+        # memory budget in bytes of the reference contraction, None refers to the module default
+        self.memory_budget = memory_budget
+
         # compute theta cutoff based on the bandlimit of the input field
         if theta_cutoff is None:
             theta_cutoff = (self.kernel_shape[0] + 1) * np.pi / float(self.nlat_in - 1)
@@ -399,36 +550,113 @@ class DiscreteContinuousConvS2(DiscreteContinuousConv):
         )
         self.register_buffer("quad_weights", quad_weights, persistable=False)
 
-        idx, vals = _precompute_convolution_tensor_s2(
+        # for grids symmetric about the equator, only the northern rows of psi are stored
+        kernel_perm = _hemispheric_kernel_permutation(
+            self.kernel_shape, self.nlat_in, self.nlat_out, grid_in=grid_in, grid_out=grid_out
+        )
+        self.symmetric = kernel_perm is not None
+        if self.symmetric:
+            self.register_buffer(
+                "kernel_perm", paddle.to_tensor(kernel_perm, dtype="int64"), persistable=False
+            )
+
+        idx, vals = _cached_convolution_tensor_s2(
             in_shape,
             out_shape,
             self.kernel_shape,
             grid_in=grid_in,
             grid_out=grid_out,
             theta_cutoff=theta_cutoff,
+            north_only=self.symmetric,
         )
 
-        self.register_buffer("psi_idx", idx, persistable=False)
-        self.register_buffer("psi_vals", vals, persistable=False)
+        # psi is kept in coalesced form, such that it is not sorted again on every call
+        psi = paddle.sparse.sparse_coo_tensor(
+            idx, vals, shape=(self.kernel_size, self.psi_nlat_out, self.nlat_in * self.nlon_in)
+        ).coalesce()
 
-    def get_psi(self):
+        self.register_buffer("psi_idx", psi.indices(), persistable=False)
+        self.register_buffer("psi_vals", psi.values(), persistable=False)
+
+        # spectra of the longitudinal filter rows of psi
+        if self.contraction == "fft":
+            psi_fft, psi_band = _precompute_psi_fft(psi, self.nlon_in)
+            self.register_buffer("psi_fft", psi_fft, persistable=False)
+            self.register_buffer("psi_band", psi_band, persistable=False)
+
+    def get_psi(self, full: bool = True):
+        """
+        Returns the convolution tensor. Unless full is set, only the stored rows are returned.
+        """
+        if not (full and self.symmetric):
+            return paddle.sparse.sparse_coo_tensor(
+                self.psi_idx,
+                self.psi_vals,
+                shape=(self.kernel_size, self.psi_nlat_out, self.nlat_in * self.nlon_in),
+            )
+        idx, vals = _reflect_convolution_tensor_s2(
+            self.psi_idx, self.psi_vals, self.kernel_perm, self.nlat_out, self.nlat_in, self.nlon_in
+        )
         psi = paddle.sparse.sparse_coo_tensor(
-            self.psi_idx,
-            self.psi_vals,
-            shape=(self.kernel_size, self.nlat_out, self.nlat_in * self.nlon_in),
+            idx, vals, shape=(self.kernel_size, self.nlat_out, self.nlat_in * self.nlon_in)
         ).coalesce()
         return psi
 
+    @property
+    def psi_nlat_out(self):
+        return (self.nlat_out + 1) // 2 if self.symmetric else self.nlat_out
+
+    def _get_contraction_indices(self, x: paddle.Tensor, psi: paddle.Tensor):
+        """
+        Shifted column indices of psi for the tiles of the reference contraction. They only depend on
+        the tile size and are kept between calls, unless the indices of all tiles exceed the budget.
+        """
+        memory_budget = _contraction_memory_budget(self.memory_budget)
+        nnz = self.psi_idx.shape[-1]
+        if nnz * self.nlon_out * self.psi_idx.element_size() > memory_budget:
+            return None
+
+        tile_size = _longitude_tile_size(
+            nnz, x.shape[0] * x.shape[1], self.nlon_out, x.element_size(), memory_budget
+        )
+        key = (tile_size, str(x.place))
+        if (
+            getattr(self, "_contraction_indices", None) is None
+            or self._contraction_indices[0] != key
+        ):
+            indices = _precompute_contraction_indices(psi, self.nlon_in, self.nlon_out, tile_size)
+            self._contraction_indices = (key, indices)
+
+        return self._contraction_indices[1]
+
     def forward(self, x: paddle.Tensor, use_triton_kernel: bool = True) -> paddle.Tensor:
         # pre-multiply x with the quadrature weights
         x = self.quad_weights * x
 
-        psi = self.get_psi()
+        psi = self.get_psi(full=False)
+
+        # the southern rows are obtained by contracting the reflected input with the northern rows
+        if self.symmetric:
+            x = paddle.concat([x, x.flip(-2)], axis=0)
 
-        if x.place.is_gpu_place() and use_triton_kernel:
+        if self.contraction == "fft":
+            x = _disco_s2_contraction_fft(x, self.psi_fft, self.psi_band, self.nlon_out)
+        elif x.place.is_gpu_place() and use_triton_kernel:
             x = _disco_s2_contraction_triton(x, psi, self.nlon_out)
         else:
-            x = _disco_s2_contraction_paddle(x, psi, self.nlon_out)
+            x = _disco_s2_contraction_paddle(
+                x,
+                psi,
+                self.nlon_out,
+                memory_budget=self.memory_budget,
+                indices=self._get_contraction_indices(x, psi),
+            )
+
+        if self.symmetric:
+            x_north, x_south = x.chunk(2, axis=0)
+            x_south = x_south.index_select(self.kernel_perm, axis=2)
+            x_south = x_south[..., : self.nlat_out // 2, :].flip(-2)
+            x = paddle.concat([x_north, x_south], axis=-2)
 
         # extract shape
         B, C, K, H, W = x.shape
@@ -467,12 +695,20 @@ class DiscreteContinuousConvTransposeS2(DiscreteContinuousConv):
         grid_out: Optional[str] = "equiangular",
         bias: Optional[bool] = True,
         theta_cutoff: Optional[float] = None,
+        contraction: Optional[str] = "sparse",
+        memory_budget: Optional[int] = None,
     ):
         super().__init__(in_channels, out_channels, kernel_shape, groups, bias)
 
         self.nlat_in, self.nlon_in = in_shape
         self.nlat_out, self.nlon_out = out_shape
 
+        if contraction not in ["sparse", "fft"]:
+            raise ValueError(f"Unknown contraction {contraction}.")
+        self.contraction = contraction
+        # memory budget in bytes of the reference contraction, None refers to the module default
+        self.memory_budget = memory_budget
+
         # bandlimit
         if theta_cutoff is None:
             theta_cutoff = (self.kernel_shape[0] + 1) * np.pi / float(self.nlat_in - 1)
@@ -490,27 +726,92 @@ class DiscreteContinuousConvTransposeS2(DiscreteContinuousConv):
         )
         self.register_buffer("quad_weights", quad_weights, persistable=False)
 
+        # for grids symmetric about the equator, only the northern rows of psi are stored
+        kernel_perm = _hemispheric_kernel_permutation(
+            self.kernel_shape, self.nlat_out, self.nlat_in, grid_in=grid_out, grid_out=grid_in
+        )
+        self.symmetric = kernel_perm is not None
+        if self.symmetric:
+            self.register_buffer(
+                "kernel_perm", paddle.to_tensor(kernel_perm, dtype="int64"), persistable=False
+            )
+
         # switch in_shape and out_shape since we want transpose conv
-        idx, vals = _precompute_convolution_tensor_s2(
+        idx, vals = _cached_convolution_tensor_s2(
             out_shape,
             in_shape,
             self.kernel_shape,
             grid_in=grid_out,
             grid_out=grid_in,
             theta_cutoff=theta_cutoff,
+            north_only=self.symmetric,
         )
 
-        self.register_buffer("psi_idx", idx, persistable=False)
-        self.register_buffer("psi_vals", vals, persistable=False)
-
-    def get_psi(self):
+        # psi is kept in coalesced form, such that it is not sorted again on every call
         psi = paddle.sparse.sparse_coo_tensor(
+            idx, vals, shape=(self.kernel_size, self.psi_nlat_in, self.nlat_out * self.nlon_out)
+        ).coalesce()
+
+        self.register_buffer("psi_idx", psi.indices(), persistable=False)
+        self.register_buffer("psi_vals", psi.values(), persistable=False)
+
+        # spectra of the longitudinal filter rows of psi
+        if self.contraction == "fft":
+            psi_fft, psi_band = _precompute_psi_fft(psi, self.nlon_out)
+            self.register_buffer("psi_fft", psi_fft, persistable=False)
+            self.register_buffer("psi_band", psi_band, persistable=False)
+
+    def get_psi(self, full: bool = True):
+        """
+        Returns the convolution tensor. Unless full is set, only the stored rows are returned.
+        """
+        if not (full and self.symmetric):
+            return paddle.sparse.sparse_coo_tensor(
+                self.psi_idx,
+                self.psi_vals,
+                shape=(self.kernel_size, self.psi_nlat_in, self.nlat_out * self.nlon_out),
+            )
+        idx, vals = _reflect_convolution_tensor_s2(
             self.psi_idx,
             self.psi_vals,
-            shape=(self.kernel_size, self.nlat_in, self.nlat_out * self.nlon_out),
+            self.kernel_perm,
+            self.nlat_in,
+            self.nlat_out,
+            self.nlon_out,
+        )
+        psi = paddle.sparse.sparse_coo_tensor(
+            idx, vals, shape=(self.kernel_size, self.nlat_in, self.nlat_out * self.nlon_out)
         ).coalesce()
         return psi
 
+    @property
+    def psi_nlat_in(self):
+        return (self.nlat_in + 1) // 2 if self.symmetric else self.nlat_in
+
+    def _get_contraction_indices(self, x: paddle.Tensor, psi: paddle.Tensor):
+        """
+        Input and shifted output indices of psi for the tiles of the reference transpose contraction.
+        They only depend on the tile size and are kept between calls, unless the indices of all tiles
+        exceed the budget.
+        """
+        memory_budget = _contraction_memory_budget(self.memory_budget)
+        nnz = self.psi_idx.shape[-1]
+        if 2 * nnz * self.nlon_in * self.psi_idx.element_size() > memory_budget:
+            return None
+
+        tile_size = _longitude_tile_size(
+            nnz, x.shape[0] * x.shape[1], self.nlon_in, x.element_size(), memory_budget
+        )
+        key = (tile_size, str(x.place))
+        if (
+            getattr(self, "_contraction_indices", None) is None
+            or self._contraction_indices[0] != key
+        ):
+            indices = _precompute_transpose_indices(psi, self.nlon_in, self.nlon_out, tile_size)
+            self._contraction_indices = (key, indices)
+
+        return self._contraction_indices[1]
+
     def forward(self, x: paddle.Tensor, use_triton_kernel: bool = True) -> paddle.Tensor:
         # extract shape
         B, C, H, W = x.shape
@@ -527,12 +828,35 @@ class DiscreteContinuousConvTransposeS2(DiscreteContinuousConv):
         # pre-multiply x with the quadrature weights
         x = self.quad_weights * x
 
-        psi = self.get_psi()
+        psi = self.get_psi(full=False)
 
-        if x.place.is_gpu_place() and use_triton_kernel:
+        # the southern rows are contracted with the northern rows of psi after reflection, where the
+        # equator must only be accounted for once
+        if self.symmetric:
+            nlat_north = self.psi_nlat_in
+            x_south = x.index_select(self.kernel_perm, axis=2).flip(-2)[..., : self.nlat_in // 2, :]
+            if nlat_north > self.nlat_in // 2:
+                x_south = paddle.concat([x_south, paddle.zeros_like(x[..., :1, :])], axis=-2)
+            x = paddle.concat([x[..., :nlat_north, :], x_south], axis=0)
+
+        if self.contraction == "fft":
+            out = _disco_s2_transpose_contraction_fft(
+                x, self.psi_fft, self.psi_band, self.nlat_out, self.nlon_out
+            )
+        elif x.place.is_gpu_place() and use_triton_kernel:
             out = _disco_s2_transpose_contraction_triton(x, psi, self.nlon_out)
         else:
-            out = _disco_s2_transpose_contraction_paddle(x, psi, self.nlon_out)
+            out = _disco_s2_transpose_contraction_paddle(
+                x,
+                psi,
+                self.nlon_out,
+                memory_budget=self.memory_budget,
+                indices=self._get_contraction_indices(x, psi),
+            )
+
+        if self.symmetric:
+            out_north, out_south = out.chunk(2, axis=0)
+            out = out_north + out_south.flip(-2)
 
         if self.bias is not None:
             out = out + self.bias.reshape(1, -1, 1, 1)
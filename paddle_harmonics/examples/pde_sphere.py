@@ -41,6 +41,11 @@ class SphereSolver(nn.Layer):
     """
     Solver class on the sphere. Can solve the following PDEs:
     - Allen-Cahn eq
+    - Ginzburg-Landau eq
+
+    The stiff diffusion term is diagonal in spectral space, such that the equations can be
+    integrated with exponential time differencing (ETDRK4) or IMEX Runge-Kutta schemes, which treat
+    it exactly and implicitly respectively.
     """
 
     def __init__(
@@ -108,20 +113,116 @@ class SphereSolver(nn.Layer):
 
         return self.isht(uspec)
 
-    def dudtspec(self, uspec, pde="allen-cahn"):
+    def linear_operator(self, pde="allen-cahn"):
+        """diagonal spectral operator of the linear part of the PDE"""
 
         if pde == "allen-cahn":
-            ugrid = self.spec2grid(uspec)
-            u3spec = self.grid2spec(ugrid**3)
-            dudtspec = self.coeff * self.lap * uspec + uspec - u3spec
+            return self.coeff * self.lap + 1.0
         elif pde == "ginzburg-landau":
-            ugrid = self.spec2grid(uspec)
-            u3spec = self.grid2spec(ugrid**3)
-            dudtspec = uspec + (1.0 + 2.0j) * self.coeff * self.lap * uspec - (1.0 + 2.0j) * u3spec
+            return (1.0 + 2.0j) * self.coeff * self.lap + 1.0
         else:
-            NotImplementedError
+            raise ValueError(f"Unknown PDE {pde}")
+
+    def nonlinear_term(self, uspec, pde="allen-cahn"):
+        """spectral coefficients of the nonlinear part of the PDE"""
+
+        ugrid = self.spec2grid(uspec)
+        u3spec = self.grid2spec(ugrid**3)
+
+        if pde == "allen-cahn":
+            return -u3spec
+        elif pde == "ginzburg-landau":
+            return -(1.0 + 2.0j) * u3spec
+        else:
+            raise ValueError(f"Unknown PDE {pde}")
+
+    def dudtspec(self, uspec, pde="allen-cahn"):
+
+        linspec = self.linear_operator(pde).astype(uspec.dtype) * uspec
+        return linspec + self.nonlinear_term(uspec, pde)
+
+    def _stepping_coefficients(self, integrator, pde, dtype):
+        """
+        Coefficients of the exponential or IMEX integrators for the current time step. These only
+        depend on the time step and the linear operator and are therefore cached.
+        """
+
+        # the linear operator is determined by the diffusion coefficient and the radius
+        key = (integrator, pde, self.dt, self.coeff.item(), self.radius.item(), dtype)
+        if getattr(self, "_coefficients", None) is None or self._coefficients[0] != key:
+            h = self.dt
+            L = self.linear_operator(pde).numpy()
+
+            if integrator == "etdrk4":
+                # evaluate the phi-functions by averaging over a contour in the complex plane to
+                # avoid cancellation for small h L, see
+                # [1] Kassam, A.-K., Trefethen, L. N.; Fourth-order time-stepping for stiff PDEs; SIAM J. Sci. Comput.
+                M = 32
+                r = np.exp(2j * np.pi * (np.arange(1, M + 1) - 0.5) / M)
+                LR = h * L[..., None] + r
+                coeffs = [
+                    np.exp(h * L),
+                    np.exp(h * L / 2),
+                    h * np.mean((np.exp(LR / 2) - 1) / LR, axis=-1),
+                    h * np.mean((-4 - LR + np.exp(LR) * (4 - 3 * LR + LR**2)) / LR**3, axis=-1),
+                    h * np.mean((2 + LR + np.exp(LR) * (LR - 2)) / LR**3, axis=-1),
+                    h * np.mean((-4 - 3 * LR - LR**2 + np.exp(LR) * (4 - LR)) / LR**3, axis=-1),
+                ]
+                # the contour average is real for real-valued operators
+                if np.all(L.imag == 0):
+                    coeffs = [c.real for c in coeffs]
+            elif integrator == "imex-rk":
+                gamma = 1.0 - 1.0 / np.sqrt(2.0)
+                coeffs = [1.0 / (1.0 - gamma * h * L), L]
+            else:
+                raise ValueError(f"Unknown integrator {integrator}")
+
+            coeffs = [paddle.to_tensor(c, place=self.lap.place).astype(dtype) for c in coeffs]
+            self._coefficients = (key, coeffs)
+
+        return self._coefficients[1]
+
+    def timestep(self, uspec, nsteps, pde="allen-cahn", integrator="etdrk4"):
+        """
+        Integrate the solution for nsteps steps using either the fourth-order exponential time
+        differencing Runge-Kutta scheme of Cox and Matthews (etdrk4) or the second-order IMEX
+        Runge-Kutta scheme ARS(2,2,2) of Ascher, Ruuth and Spiteri (imex-rk). Both treat the
+        stiff linear term exactly or implicitly, such that the time step is limited by the
+        nonlinearity only.
+        """
 
-        return dudtspec
+        if pde not in ["allen-cahn", "ginzburg-landau"]:
+            raise ValueError(f"Unknown PDE {pde}")
+        if integrator not in ["etdrk4", "imex-rk"]:
+            raise ValueError(f"Unknown integrator {integrator}")
+
+        h = self.dt
+        coeffs = self._stepping_coefficients(integrator, pde, uspec.dtype)
+
+        # ARS(2,2,2) tableau
+        gamma = 1.0 - 1.0 / np.sqrt(2.0)
+        delta = 1.0 - 1.0 / (2.0 * gamma)
+
+        for iter in range(nsteps):
+            if integrator == "etdrk4":
+                E, E2, Q, f1, f2, f3 = coeffs
+                Nu = self.nonlinear_term(uspec, pde)
+                a = E2 * uspec + Q * Nu
+                Na = self.nonlinear_term(a, pde)
+                b = E2 * uspec + Q * Na
+                Nb = self.nonlinear_term(b, pde)
+                c = E2 * a + Q * (2 * Nb - Nu)
+                Nc = self.nonlinear_term(c, pde)
+                uspec = E * uspec + f1 * Nu + 2 * f2 * (Na + Nb) + f3 * Nc
+            else:
+                invimp, L = coeffs
+                Nu = self.nonlinear_term(uspec, pde)
+                u2 = invimp * (uspec + (gamma * h) * Nu)
+                N2 = self.nonlinear_term(u2, pde)
+                rhs = uspec + h * (delta * Nu + (1 - delta) * N2) + ((1 - gamma) * h) * L * u2
+                uspec = invimp * rhs
+
+        return uspec
 
     def randspec(self):
         """random data on the sphere"""
@@ -30,4 +30,5 @@
 #
 
 from .utils.pde_dataset import PdeDataset
+from .utils.pde_dataset import PdeStoreDataset
 from .models.sfno import SphericalFourierNeuralOperatorNet
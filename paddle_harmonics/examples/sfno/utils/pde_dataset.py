@@ -29,15 +29,162 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
 from math import ceil
 
+import numpy as np
 import paddle
 
 from ...shallow_water_equations import ShallowWaterSolver
 
+# random streams derived from the seed of a PdeDataset
+_TRAINING_STREAM = 0
+_STATISTICS_STREAM = 1
+
+
+class RunningStatistics:
+    """
+    Streaming per-channel mean and variance of fields of shape [..., channels, nlat, nlon]. Batches
+    and partial statistics are combined with the parallel variant of Welford's algorithm, such that
+    statistics accumulated by different workers or ranks can be merged exactly.
+    """
+
+    def __init__(self, count=0, mean=None, m2=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean.copy(), other.m2.copy()
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        return self
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        x = x.reshape(-1, *x.shape[-3:]).transpose(1, 0, 2, 3).reshape(x.shape[-3], -1)
+        mean = x.mean(axis=-1)
+        m2 = ((x - mean[:, None]) ** 2).sum(axis=-1)
+        return self.merge(RunningStatistics(x.shape[-1], mean, m2))
+
+    @property
+    def var(self):
+        # unbiased estimate, consistent with paddle.var
+        return self.m2 / (self.count - 1)
+
+    def all_reduce(self):
+        """merges the statistics of all ranks of the default process group"""
+        if paddle.distributed.is_initialized() and paddle.distributed.get_world_size() > 1:
+            gathered = []
+            paddle.distributed.all_gather_object(gathered, self.state_dict())
+            merged = RunningStatistics()
+            for state in gathered:
+                merged.merge(RunningStatistics.from_state_dict(state))
+            self.count, self.mean, self.m2 = merged.count, merged.mean, merged.m2
+        return self
+
+    def state_dict(self):
+        # empty statistics, e.g. of ranks without samples, have neither mean nor m2
+        if self.count == 0:
+            return dict(count=0, mean=None, m2=None)
+        return dict(count=self.count, mean=self.mean.tolist(), m2=self.m2.tolist())
+
+    @classmethod
+    def from_state_dict(cls, state):
+        if state["count"] == 0:
+            return cls()
+        return cls(state["count"], np.asarray(state["mean"]), np.asarray(state["m2"]))
+
+    def save(self, path, metadata=None):
+        """
+        writes the statistics and optionally the metadata of the data they were computed from to
+        path. A temporary file is written first, such that the file is either complete or absent.
+        """
+        state = self.state_dict()
+        if metadata is not None:
+            state["metadata"] = metadata
+
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".", dir=os.path.dirname(os.path.abspath(path))
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, metadata=None):
+        """reads statistics from path, which have to match the given metadata if it is not None"""
+        with open(path, "r") as f:
+            state = json.load(f)
+
+        if metadata is not None and state.get("metadata") != metadata:
+            raise ValueError(
+                f"Statistics in {path} were computed for {state.get('metadata')}, "
+                f"which does not match {metadata}"
+            )
+        return cls.from_state_dict(state)
+
+
+class _StatisticsShards(paddle.io.Dataset):
+    """Splits the accumulation of normalization statistics into chunks, which workers process"""
+
+    def __init__(self, dataset, num_samples, batch_size):
+        self.dataset = dataset
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return ceil(self.num_samples / self.batch_size)
+
+    def __getitem__(self, index):
+        batch_size = min(self.batch_size, self.num_samples - index * self.batch_size)
+        # the samples are drawn from a stream of their own
+        with paddle.no_grad():
+            inp, _ = self.dataset._get_sample(batch_size=batch_size, stream=_STATISTICS_STREAM)
+        stats = RunningStatistics().update(inp.numpy())
+        return np.array(stats.count), stats.mean, stats.m2
+
 
 class PdeDataset(paddle.io.Dataset):
-    """Custom Dataset class for PDE training data"""
+    """
+    Custom Dataset class for PDE training data
+
+    By default, every sample is integrated from a fresh initial condition. If pairs_per_trajectory
+    is larger than one or spinup is set, samples are instead sliced from long trajectories: each
+    initial condition is first integrated for spinup intervals of length dt, after which
+    pairs_per_trajectory consecutive (t, t + dt) pairs are taken, starting stride intervals apart.
+
+    The dataset can be used with DataLoader worker processes. Each process lazily builds its own
+    solver and draws its initial conditions from random generators of its own, such that the global
+    random state of paddle is left to the training loop. The generators of a process are seeded from
+    seed, or if it is None from a single draw of the global random state, together with the epoch,
+    the rank and the worker id. set_epoch reseeds the calling process, but only reaches worker
+    processes started afterwards. With persistent_workers, the workers keep their copy of the
+    dataset and continue their streams instead. The normalization statistics are computed once in
+    the main process and shared with the workers. If prefetch is positive, samples are generated
+    ahead of time by a background thread, which shares the solver of its process under a lock.
+
+    The normalization statistics are accumulated over normalization_samples samples and, if
+    stats_path is given, stored there by rank 0 and reloaded by subsequent datasets, provided that
+    they were computed for the same configuration.
+    """
 
     def __init__(
         self,
@@ -50,10 +197,20 @@ class PdeDataset(paddle.io.Dataset):
         device=paddle.CPUPlace(),
         normalize=True,
         stream=None,
+        integrator="adams-bashforth",
+        spinup=0,
+        pairs_per_trajectory=1,
+        stride=1,
+        seed=None,
+        prefetch=0,
+        normalization_samples=1,
+        stats_path=None,
     ):
         self.num_examples = num_examples
         self.device = device
         self.stream = stream
+        self.dt = dt
+        self.pde = pde
 
         self.nlat = dims[0]
         self.nlon = dims[1]
@@ -62,62 +219,231 @@ class PdeDataset(paddle.io.Dataset):
         self.nsteps = nsteps
         self.normalize = normalize
 
-        if pde == "shallow water equations":
-            lmax = ceil(self.nlat / 3)
-            mmax = lmax
-            dt_solver = dt / float(self.nsteps)
-            self.solver = ShallowWaterSolver(
-                self.nlat, self.nlon, dt_solver, lmax=lmax, mmax=mmax, grid="equiangular"
-            ).to(device=self.device, dtype=paddle.float32)
-        else:
+        # trajectory reuse
+        self.spinup = spinup
+        self.pairs_per_trajectory = pairs_per_trajectory
+        self.stride = stride
+        self._trajectory = None
+
+        # per-process state, which is rebuilt lazily in each worker
+        self.integrator = integrator
+        self.seed = seed
+        self.epoch = 0
+        self.prefetch = prefetch
+        self._solver = None
+        self._pid = None
+        self._queue = None
+        self._lock = None
+        self._generators = None
+
+        if pde != "shallow water equations":
             raise NotImplementedError
 
         self.set_initial_condition(ictype=initial_condition)
 
         if self.normalize:
-            inp0, _ = self._get_sample()
-            self.inp_mean = paddle.mean(inp0, axis=(-1, -2)).reshape(-1, 1, 1)
-            self.inp_var = paddle.var(inp0, axis=(-1, -2)).reshape(-1, 1, 1)
+            if stats_path is not None and os.path.isfile(stats_path):
+                self.stats = RunningStatistics.load(stats_path, self._statistics_metadata())
+            else:
+                self.stats = self.compute_statistics(normalization_samples)
+                # the statistics are identical on all ranks after the reduction
+                rank = paddle.distributed.get_rank() if paddle.distributed.is_initialized() else 0
+                if stats_path is not None and rank == 0:
+                    self.stats.save(stats_path, self._statistics_metadata())
+
+            self.inp_mean = paddle.to_tensor(self.stats.mean, place=self.device)
+            self.inp_mean = self.inp_mean.astype(paddle.float32).reshape([-1, 1, 1])
+            self.inp_var = paddle.to_tensor(self.stats.var, place=self.device)
+            self.inp_var = self.inp_var.astype(paddle.float32).reshape([-1, 1, 1])
+
+    def _statistics_metadata(self):
+        """configuration which determines the distribution of the input fields"""
+        return dict(
+            pde=self.pde,
+            initial_condition=self.ictype,
+            integrator=self.integrator,
+            nlat=self.nlat,
+            nlon=self.nlon,
+            dt=self.dt,
+            nsteps=self.nsteps,
+            spinup=self.spinup,
+        )
+
+    def compute_statistics(self, num_samples, batch_size=8, num_workers=0):
+        """
+        Accumulates the per-channel statistics of the input fields over num_samples samples without
+        storing them. The samples are split between the ranks of the default process group and
+        optionally between num_workers DataLoader workers, whose partial statistics are merged. If
+        seed is given, the samples are drawn from a random stream separate from the training samples.
+        """
+
+        world_size = 1
+        rank = 0
+        if paddle.distributed.is_initialized():
+            world_size = paddle.distributed.get_world_size()
+            rank = paddle.distributed.get_rank()
+        num_samples = num_samples // world_size + int(rank < num_samples % world_size)
+
+        shards = _StatisticsShards(self, num_samples, batch_size)
+        if num_workers > 0:
+            shards = paddle.io.DataLoader(shards, batch_size=None, num_workers=num_workers)
+        else:
+            shards = map(shards.__getitem__, range(len(shards)))
+
+        # the trajectory of this process is restored after the pass, such that the training samples
+        # are unaffected by it
+        stats = RunningStatistics()
+        with self._process_lock:
+            self.solver
+            trajectory, self._trajectory = self._trajectory, None
+            try:
+                for count, mean, m2 in shards:
+                    stats.merge(RunningStatistics(int(count), np.asarray(mean), np.asarray(m2)))
+            finally:
+                self._trajectory = trajectory
+
+        return stats.all_reduce()
 
     def __len__(self):
         length = self.num_examples if self.ictype == "random" else 1
         return length
 
+    def __getstate__(self):
+        # the solver, trajectory generator and prefetch thread are not shared with worker processes
+        state = self.__dict__.copy()
+        state.update(
+            _solver=None, _pid=None, _trajectory=None, _queue=None, _lock=None, _generators=None
+        )
+        return state
+
+    @property
+    def _process_lock(self):
+        # guards the solver, its work buffers and the trajectory against the prefetch thread. The
+        # lock is created per process, as a forked copy may be held by the thread of the parent.
+        if self._lock is None or self._lock[0] != os.getpid():
+            self._lock = (os.getpid(), threading.RLock())
+        return self._lock[1]
+
+    @property
+    def solver(self):
+        if self._solver is None or self._pid != os.getpid():
+            lmax = ceil(self.nlat / 3)
+            mmax = lmax
+            dt_solver = self.dt / float(self.nsteps)
+            self._solver = ShallowWaterSolver(
+                self.nlat,
+                self.nlon,
+                dt_solver,
+                lmax=lmax,
+                mmax=mmax,
+                grid="equiangular",
+                integrator=self.integrator,
+            ).to(device=self.device, dtype=paddle.float32)
+            self._pid = os.getpid()
+            self._trajectory = None
+            self._queue = None
+
+        return self._solver
+
+    def _random_generator(self, stream):
+        """numpy generator of the given random stream of this process, seeded on first use"""
+        if self._generators is None or self._generators[0] != os.getpid():
+            self._generators = (os.getpid(), {})
+
+        generators = self._generators[1]
+        if stream not in generators:
+            seed = self.seed
+            if seed is None:
+                seed = int(paddle.randint(0, 2**31 - 1, [1]).item())
+            rank = paddle.distributed.get_rank() if paddle.distributed.is_initialized() else 0
+            # the keys have a fixed length, as SeedSequence does not distinguish keys which only
+            # differ by trailing zeros. The main process takes worker slot 0.
+            worker_info = paddle.io.get_worker_info()
+            worker = 0 if worker_info is None else worker_info.id + 1
+            seq = np.random.SeedSequence([seed, stream, self.epoch, rank, worker])
+            generators[stream] = np.random.default_rng(seq)
+
+        return generators[stream]
+
+    def _discard_samples(self):
+        """discards the current trajectory and the prefetched samples of this process"""
+        with self._process_lock:
+            self._trajectory = None
+            samples, self._queue = self._queue, None
+
+        # unblock the prefetch thread, which stops once it finds its queue replaced
+        while samples is not None:
+            try:
+                samples.get_nowait()
+            except queue.Empty:
+                break
+
+    def set_epoch(self, epoch):
+        """
+        sets the epoch, which reseeds the training stream of this process and is used to derive the
+        random streams of non-persistent workers
+        """
+        with self._process_lock:
+            self.epoch = epoch
+            if self._generators is not None and self._generators[0] == os.getpid():
+                self._generators[1].pop(_TRAINING_STREAM, None)
+        self._discard_samples()
+
     def set_initial_condition(self, ictype="random"):
-        self.ictype = ictype
+        with self._process_lock:
+            self.ictype = ictype
+        self._discard_samples()
 
     def set_num_examples(self, num_examples=32):
         self.num_examples = num_examples
 
-    def _get_sample(self):
+    def _initial_condition(self, batch_size=None, stream=_TRAINING_STREAM):
         if self.ictype == "random":
-            inp = self.solver.random_initial_condition(mach=0.2)
+            return self.solver.random_initial_condition(
+                mach=0.2, batch_size=batch_size, generator=self._random_generator(stream)
+            )
         elif self.ictype == "galewsky":
-            inp = self.solver.galewsky_initial_condition()
+            return self.solver.galewsky_initial_condition(batch_size=batch_size)
 
-        # solve pde for n steps to return the target
-        tar = self.solver.timestep(inp, self.nsteps)
-        inp = self.solver.spec2grid(inp)
-        tar = self.solver.spec2grid(tar)
+    def _trajectory_pairs(self, batch_size=None, stream=_TRAINING_STREAM):
+        """
+        Generator of consecutive (t, t + dt) pairs in spectral space along trajectories, which are
+        restarted from a new initial condition after pairs_per_trajectory pairs.
+        """
+        while True:
+            uspec = self._initial_condition(batch_size, stream)
+            uspec = self.solver.timestep(uspec, self.spinup * self.nsteps)
 
-        return inp, tar
+            for pair in range(self.pairs_per_trajectory):
+                tar = self.solver.timestep(uspec, self.nsteps)
+                yield uspec, tar
 
-    def __getitem__(self, index):
+                if pair < self.pairs_per_trajectory - 1:
+                    uspec = self.solver.timestep(tar, (self.stride - 1) * self.nsteps)
 
-        # if self.stream is None:
-        #     self.stream = paddle.cuda.Stream()
+    def _get_sample(self, batch_size=None, stream=_TRAINING_STREAM):
+        with self._process_lock:
+            if self.pairs_per_trajectory > 1 or self.spinup > 0:
+                # building the solver of a new process discards the trajectory, so it has to exist
+                # before the generator is created. The generator is restarted whenever the batch
+                # size or the random stream changes.
+                self.solver
+                if self._trajectory is None or self._trajectory[0] != (batch_size, stream):
+                    pairs = self._trajectory_pairs(batch_size, stream)
+                    self._trajectory = ((batch_size, stream), pairs)
+                inp, tar = next(self._trajectory[1])
+            else:
+                inp = self._initial_condition(batch_size, stream)
 
-        # with paddle.cuda.stream(self.stream):
-        #     with paddle.inference_mode():
-        #         with paddle.no_grad():
-        #             inp, tar = self._get_sample()
+                # solve pde for n steps to return the target
+                tar = self.solver.timestep(inp, self.nsteps)
 
-        #             if self.normalize:
-        #                 inp = (inp - self.inp_mean) / paddle.sqrt(self.inp_var)
-        #                 tar = (tar - self.inp_mean) / paddle.sqrt(self.inp_var)
+            inp = self.solver.spec2grid(inp)
+            tar = self.solver.spec2grid(tar)
 
-        # self.stream.synchronize()
+        return inp, tar
 
+    def _get_normalized_sample(self):
         with paddle.no_grad():
             inp, tar = self._get_sample()
 
@@ -126,3 +452,120 @@ class PdeDataset(paddle.io.Dataset):
                 tar = (tar - self.inp_mean) / paddle.sqrt(self.inp_var)
 
         return inp.clone(), tar.clone()
+
+    def _prefetch_worker(self, samples):
+        # the thread stops once its queue is discarded
+        while self._queue is samples:
+            samples.put(self._get_normalized_sample())
+
+    def __getitem__(self, index):
+
+        if self.prefetch > 0:
+            # start a background thread generating samples ahead of time in this process
+            if self._queue is None or self._pid != os.getpid():
+                # build the solver and seed the stream of this process before the thread uses them
+                self.solver
+                self._random_generator(_TRAINING_STREAM)
+                self._queue = queue.Queue(maxsize=self.prefetch)
+                thread = threading.Thread(
+                    target=self._prefetch_worker, args=(self._queue,), daemon=True
+                )
+                thread.start()
+            return self._queue.get()
+
+        return self._get_normalized_sample()
+
+    def generate(self, path, num_examples=None, batch_size=8):
+        """
+        Integrates num_examples samples once and writes the (input, target) grids to a memory-mapped
+        store at path, which can be read with PdeStoreDataset. Samples are generated as batches of
+        batch_size and written chunk by chunk, such that the whole dataset is never held in memory.
+        """
+
+        if os.path.exists(path):
+            raise FileExistsError(f"Dataset store {path} already exists")
+
+        num_examples = len(self) if num_examples is None else num_examples
+        shape = (num_examples, 3, self.nlat, self.nlon)
+
+        # write to a temporary directory first, such that a store is either complete or absent
+        tmp_path = tempfile.mkdtemp(
+            prefix=os.path.basename(os.path.normpath(path)) + ".",
+            dir=os.path.dirname(os.path.abspath(path)),
+        )
+        try:
+            inp_store = np.lib.format.open_memmap(
+                os.path.join(tmp_path, "inp.npy"), mode="w+", dtype=np.float32, shape=shape
+            )
+            tar_store = np.lib.format.open_memmap(
+                os.path.join(tmp_path, "tar.npy"), mode="w+", dtype=np.float32, shape=shape
+            )
+
+            for start in range(0, num_examples, batch_size):
+                stop = min(start + batch_size, num_examples)
+                with paddle.no_grad():
+                    inp, tar = self._get_sample(batch_size=stop - start)
+
+                    if self.normalize:
+                        inp = (inp - self.inp_mean) / paddle.sqrt(self.inp_var)
+                        tar = (tar - self.inp_mean) / paddle.sqrt(self.inp_var)
+
+                inp_store[start:stop] = inp.numpy()
+                tar_store[start:stop] = tar.numpy()
+
+            inp_store.flush()
+            tar_store.flush()
+            del inp_store, tar_store
+
+            metadata = dict(
+                pde=self.pde,
+                initial_condition=self.ictype,
+                nlat=self.nlat,
+                nlon=self.nlon,
+                dt=self.dt,
+                nsteps=self.nsteps,
+                grid=self.solver.grid,
+                num_examples=num_examples,
+                normalize=self.normalize,
+            )
+            if self.normalize:
+                metadata["inp_mean"] = self.inp_mean.flatten().tolist()
+                metadata["inp_var"] = self.inp_var.flatten().tolist()
+                self.stats.save(os.path.join(tmp_path, "stats.json"), self._statistics_metadata())
+            with open(os.path.join(tmp_path, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2)
+
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return path
+
+
+class PdeStoreDataset(paddle.io.Dataset):
+    """
+    Dataset serving the (input, target) pairs of a store written by PdeDataset.generate. The grids are
+    memory-mapped and returned as views into the store, which are only copied once batched.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, "metadata.json"), "r") as f:
+            self.metadata = json.load(f)
+
+        self.nlat = self.metadata["nlat"]
+        self.nlon = self.metadata["nlon"]
+        self.normalize = self.metadata["normalize"]
+
+        self.inp = np.load(os.path.join(path, "inp.npy"), mmap_mode="r")
+        self.tar = np.load(os.path.join(path, "tar.npy"), mmap_mode="r")
+
+        if self.normalize:
+            self.inp_mean = paddle.to_tensor(self.metadata["inp_mean"]).reshape([-1, 1, 1])
+            self.inp_var = paddle.to_tensor(self.metadata["inp_var"]).reshape([-1, 1, 1])
+
+    def __len__(self):
+        return self.inp.shape[0]
+
+    def __getitem__(self, index):
+        return self.inp[index], self.tar[index]
@@ -42,6 +42,14 @@ from paddle_harmonics.utils import paddle_aux
 class ShallowWaterSolver(nn.Layer):
     """
     SWE solver class. Interface inspired bu pyspharm and SHTns
+
+    The state is represented by the spectral coefficients of geopotential, vorticity and divergence,
+    stacked along the third-to-last axis, i.e. uspec has the shape [..., 3, lmax, mmax]. Leading
+    dimensions are treated as a batch, such that an ensemble of states is advanced at once.
+
+    The solution is integrated either with the explicit third-order Adams-Bashforth scheme or with
+    a semi-implicit leapfrog scheme with Robert-Asselin filter, which treats the linear gravity-wave
+    terms implicitly and therefore permits considerably larger time steps.
     """
 
     def __init__(
@@ -57,11 +65,17 @@ class ShallowWaterSolver(nn.Layer):
         gravity=9.80616,
         havg=10.0e3,
         hamp=120.0,
+        integrator="adams-bashforth",
+        robert_filter=0.05,
     ):
         super().__init__()
 
         # time stepping param
         self.dt = dt
+        if integrator not in ["adams-bashforth", "semi-implicit"]:
+            raise ValueError(f"Unknown integrator {integrator}")
+        self.integrator = integrator
+        self.robert_filter = robert_filter
 
         # grid parameters
         self.nlat = nlat
@@ -158,8 +172,8 @@ class ShallowWaterSolver(nn.Layer):
         """
         compute wind vector from spectral coeffs of vorticity and divergence
         """
-        hgrid = self.spec2grid(uspec[:1])
-        uvgrid = self.getuv(uspec[1:])
+        hgrid = self.spec2grid(uspec[..., :1, :, :])
+        uvgrid = self.getuv(uspec[..., 1:, :, :])
         return paddle.concat((hgrid, uvgrid), axis=-3)
 
     def potential_vorticity(self, uspec):
@@ -167,49 +181,87 @@ class ShallowWaterSolver(nn.Layer):
         Compute potential vorticity
         """
         ugrid = self.spec2grid(uspec)
-        pvrt = (0.5 * self.havg * self.gravity / self.omega) * (ugrid[1] + self.coriolis) / ugrid[0]
+        pvrt = (
+            (0.5 * self.havg * self.gravity / self.omega)
+            * (ugrid[..., 1, :, :] + self.coriolis)
+            / ugrid[..., 0, :, :]
+        )
         return pvrt
 
     def dimensionless(self, uspec):
         """
         Remove dimensions from variables
         """
-        uspec[0] = (uspec[0] - self.havg * self.gravity) / self.hamp / self.gravity
+        uspec[..., 0, :, :] = (
+            (uspec[..., 0, :, :] - self.havg * self.gravity) / self.hamp / self.gravity
+        )
         # vorticity is measured in 1/s so we normalize using sqrt(g h) / r
-        uspec[1:] = uspec[1:] * self.radius / paddle.sqrt(self.gravity * self.havg)
+        uspec[..., 1:, :, :] = (
+            uspec[..., 1:, :, :] * self.radius / paddle.sqrt(self.gravity * self.havg)
+        )
         return uspec
 
-    def dudtspec(self, uspec):
+    def _get_workspace(self, uspec):
         """
-        Compute time derivatives from solution represented in spectral coefficients
+        Preallocated work buffers for time stepping states with the shape and dtype of uspec.
+        The buffers are kept between calls to timestep and only reallocated if the state changes.
         """
+        key = (tuple(uspec.shape), uspec.dtype, str(uspec.place))
+        if getattr(self, "_workspace", None) is None or self._workspace[0] != key:
+            batch_shape = list(uspec.shape[:-3])
+            dtype = self.lap.dtype
+            hyperdiff = paddle.concat(
+                [paddle.ones_like(self.hyperdiff).unsqueeze(0), self.hyperdiff.expand([2, -1, -1])]
+            )
+            work = dict(
+                dudtspec=[paddle.empty_like(uspec) for _ in range(3)],
+                phivrt=paddle.empty(batch_shape + [2, self.nlat, self.nlon], dtype=dtype),
+                flux=paddle.empty(batch_shape + [2, 2, self.nlat, self.nlon], dtype=dtype),
+                uvsq=paddle.empty(batch_shape + [2, self.nlat, self.nlon], dtype=dtype),
+                energy=paddle.empty(batch_shape + [self.nlat, self.nlon], dtype=dtype),
+                hyperdiff=hyperdiff.astype(uspec.dtype),
+            )
+            self._workspace = (key, work)
 
-        dudtspec = paddle.zeros_like(uspec)
-
-        # compute the derivatives - this should be incorporated into the solver:
-        ugrid = self.spec2grid(uspec)
-        uvgrid = self.getuv(uspec[1:])
-
-        # phi = ugrid[0]
-        # vrtdiv = ugrid[1:]
+        return self._workspace[1]
 
-        tmp = uvgrid * (ugrid[1] + self.coriolis)
-        tmpspec = self.vrtdivspec(tmp)
-        dudtspec[2] = tmpspec[0]
-        dudtspec[1] = -1 * tmpspec[1]
+    def dudtspec(self, uspec, out=None, work=None):
+        """
+        Compute time derivatives from solution represented in spectral coefficients. If out is given,
+        the result is written into it and the grid-space temporaries are taken from the work buffers.
+        """
 
-        tmp = uvgrid * ugrid[0]
-        tmp = self.vrtdivspec(tmp)
-        dudtspec[0] = -1 * tmp[1]
+        dudtspec = paddle.zeros_like(uspec) if out is None else out
+        work = dict() if work is None else work
 
-        tmpspec = self.grid2spec(ugrid[0] + 0.5 * (uvgrid[0] ** 2 + uvgrid[1] ** 2))
-        dudtspec[2] = dudtspec[2] - self.lap * tmpspec
+        # compute the derivatives - this should be incorporated into the solver:
+        # only geopotential and vorticity are required on the grid
+        ugrid = self.spec2grid(uspec[..., :2, :, :])
+        uvgrid = self.getuv(uspec[..., 1:, :, :])
+
+        # the fluxes of geopotential and absolute vorticity are transformed in a single pass
+        offset = paddle.stack([paddle.zeros_like(self.coriolis), self.coriolis])
+        phivrt = paddle.add(ugrid, offset, out=work.get("phivrt"))
+        flux = paddle.multiply(phivrt.unsqueeze(-3), uvgrid.unsqueeze(-4), out=work.get("flux"))
+        fluxspec = self.vrtdivspec(flux)
+
+        # d/dt (phi, vrt) = - div (phi u, (vrt + f) u)
+        dudtspec[..., :2, :, :] = -1 * fluxspec[..., 1, :, :]
+        dudtspec[..., 2, :, :] = fluxspec[..., 1, 0, :, :]
+
+        uvsq = paddle.multiply(uvgrid, uvgrid, out=work.get("uvsq"))
+        energy = paddle.add(
+            ugrid[..., 0, :, :], 0.5 * paddle.sum(uvsq, axis=-3), out=work.get("energy")
+        )
+        tmpspec = self.grid2spec(energy)
+        dudtspec[..., 2, :, :] = dudtspec[..., 2, :, :] - self.lap * tmpspec
 
         return dudtspec
 
-    def galewsky_initial_condition(self):
+    def galewsky_initial_condition(self, batch_size=None):
         """
         Initializes non-linear barotropically unstable shallow water test case of Galewsky et al. (2004, Tellus, 56A, 429-440).
+        If batch_size is given, the initial condition is repeated along a leading batch dimension.
 
         [1] Galewsky; An initial-value problem for testing numerical models of the global shallow-water equations;
             DOI: 10.1111/j.1600-0870.2004.00071.x; http://www-vortex.mcs.st-and.ac.uk/~rks/reprints/galewsky_etal_tellus_2004.pdf
@@ -259,11 +311,16 @@ class ShallowWaterSolver(nn.Layer):
         uspec[0] = phispec
         uspec[1:] = vrtdivspec
 
+        if batch_size is not None:
+            uspec = paddle.tile(uspec.unsqueeze(0), [batch_size, 1, 1, 1])
+
         return paddle.tril(uspec)
 
-    def random_initial_condition(self, mach=0.1) -> paddle.Tensor:
+    def random_initial_condition(self, mach=0.1, batch_size=None, generator=None) -> paddle.Tensor:
         """
-        random initial condition on the sphere
+        random initial condition on the sphere. If batch_size is given, a batch of independent
+        initial conditions is drawn. If a numpy generator is given, the random coefficients are
+        drawn from it instead of the global random state of paddle.
         """
         device = self.lap.place
         ctype = paddle.complex128 if self.lap.dtype == paddle.float64 else paddle.complex64
@@ -277,18 +334,29 @@ class ShallowWaterSolver(nn.Layer):
         # ugrid = paddle.stack((ugrid, vgrid))
 
         # initial geopotential
-        uspec = paddle.zeros([3, self.lmax, self.mmax], dtype=ctype)
-        uspec[:, :llimit, :mlimit] = paddle_aux.sqrt_complex(
+        batch_shape = [] if batch_size is None else [batch_size]
+        uspec = paddle.zeros(batch_shape + [3, self.lmax, self.mmax], dtype=ctype)
+        shape = uspec[..., :llimit, :mlimit].shape
+        if generator is None:
+            noise = paddle.randn(shape, uspec.dtype)
+        else:
+            # complex standard normal samples, as drawn by paddle.randn
+            noise = generator.standard_normal(shape) + 1j * generator.standard_normal(shape)
+            noise = paddle.to_tensor(noise / np.sqrt(2.0), place=device).astype(ctype)
+        scale = paddle_aux.sqrt_complex(
             paddle.to_tensor(4 * np.pi / llimit / (llimit + 1), place=device, dtype=ctype)
-        ) * paddle.randn(uspec[:, :llimit, :mlimit].shape, uspec.dtype)
+        )
+        uspec[..., :llimit, :mlimit] = scale * noise
 
-        uspec[0] = self.gravity * self.hamp * uspec[0]
-        uspec[0, 0, 0] += (
+        uspec[..., 0, :, :] = self.gravity * self.hamp * uspec[..., 0, :, :]
+        uspec[..., 0, 0, 0] += (
             paddle_aux.sqrt_complex(paddle.to_tensor(4 * np.pi, place=device, dtype=ctype))
             * self.havg
             * self.gravity
         )
-        uspec[1:] = mach * uspec[1:] * paddle.sqrt(self.gravity * self.havg) / self.radius
+        uspec[..., 1:, :, :] = (
+            mach * uspec[..., 1:, :, :] * paddle.sqrt(self.gravity * self.havg) / self.radius
+        )
         # uspec[1:] = self.vrtdivspec(self.spec2grid(uspec[1:]) * paddle.cos(self.lats.reshape(-1, 1)))
 
         # # intial velocity field
@@ -314,11 +382,33 @@ class ShallowWaterSolver(nn.Layer):
         return paddle.tril(uspec)
 
     def timestep(self, uspec: paddle.Tensor, nsteps: int) -> paddle.Tensor:
+        """
+        Integrate the solution for nsteps steps with the integrator chosen at construction.
+        Leading dimensions of uspec are treated as a batch.
+        """
+
+        if self.integrator == "semi-implicit":
+            return self._timestep_semi_implicit(uspec, nsteps)
+        return self._timestep_adams_bashforth(uspec, nsteps)
+
+    def _timestep_adams_bashforth(self, uspec: paddle.Tensor, nsteps: int) -> paddle.Tensor:
         """
         Integrate the solution using Adams-Bashforth / forward Euler for nsteps steps.
+        The tendency history and grid-space temporaries are preallocated and the state is updated
+        in place.
         """
 
-        dudtspec = paddle.zeros([3, 3, self.lmax, self.mmax], dtype=uspec.dtype)
+        work = self._get_workspace(uspec)
+        dudtspec = work["dudtspec"]
+        uspec = uspec.clone()
+
+        # adams-bashforth weights for the newest, current and oldest tendency. The first two steps
+        # are started with forward euler and a two-step method, as the history is not filled yet.
+        weights = [
+            (1.0, 0.0, 0.0),
+            (28.0 / 12.0, -16.0 / 12.0, 0.0),
+            (23.0 / 12.0, -16.0 / 12.0, 5.0 / 12.0),
+        ]
 
         # pointers to indicate the most current result
         inew = 0
@@ -326,24 +416,15 @@ class ShallowWaterSolver(nn.Layer):
         iold = 2
 
         for iter in range(nsteps):
-            dudtspec[inew] = self.dudtspec(uspec)
+            self.dudtspec(uspec, out=dudtspec[inew], work=work)
 
             # update vort,div,phiv with third-order adams-bashforth.
-            # forward euler, then 2nd-order adams-bashforth time steps to start.
-            if iter == 0:
-                dudtspec[inow] = dudtspec[inew]
-                dudtspec[iold] = dudtspec[inew]
-            elif iter == 1:
-                dudtspec[iold] = dudtspec[inew]
-
-            uspec = uspec + self.dt * (
-                (23.0 / 12.0) * dudtspec[inew]
-                - (16.0 / 12.0) * dudtspec[inow]
-                + (5.0 / 12.0) * dudtspec[iold]
-            )
+            for i, weight in zip((inew, inow, iold), weights[min(iter, 2)]):
+                if weight != 0.0:
+                    uspec.add_(dudtspec[i], alpha=self.dt * weight)
 
             # implicit hyperdiffusion for vort and div.
-            uspec[1:] = self.hyperdiff * uspec[1:]
+            uspec.multiply_(work["hyperdiff"])
 
             # cycle through the indices
             inew = (inew - 1) % 3
@@ -352,6 +433,66 @@ class ShallowWaterSolver(nn.Layer):
 
         return uspec
 
+    def _semi_implicit_step(self, uold, unow, dudtspec, h, out):
+        """
+        Advances uold by h using the tendencies evaluated at unow. The gravity-wave terms, i.e. the
+        geopotential gradient in the divergence equation and the mean depth times divergence in the
+        geopotential equation, are averaged between uold and the new state and solved for exactly,
+        as the Laplacian is diagonal in spectral space.
+        """
+
+        phibar = self.gravity * self.havg
+        lap = self.lap.astype(dudtspec.dtype)
+
+        # explicit tendencies without the linear gravity-wave terms
+        nphi = dudtspec[..., 0, :, :] + phibar * unow[..., 2, :, :]
+        ndiv = dudtspec[..., 2, :, :] + lap * unow[..., 0, :, :]
+
+        # solve the 2x2 system of the implicit terms for each mode
+        rhsphi = uold[..., 0, :, :] + h * nphi - (0.5 * h) * phibar * uold[..., 2, :, :]
+        rhsdiv = uold[..., 2, :, :] + h * ndiv - (0.5 * h) * lap * uold[..., 0, :, :]
+        div = (rhsdiv - (0.5 * h) * lap * rhsphi) / (1.0 - (0.5 * h) ** 2 * phibar * lap)
+
+        out[..., 0, :, :] = rhsphi - (0.5 * h) * phibar * div
+        out[..., 1, :, :] = uold[..., 1, :, :] + h * dudtspec[..., 1, :, :]
+        out[..., 2, :, :] = div
+
+        return out
+
+    def _timestep_semi_implicit(self, uspec: paddle.Tensor, nsteps: int) -> paddle.Tensor:
+        """
+        Integrate the solution using a semi-implicit leapfrog scheme with Robert-Asselin filter for
+        nsteps steps. The first step is a semi-implicit forward step.
+        """
+
+        work = self._get_workspace(uspec)
+        dudtspec = work["dudtspec"][0]
+        uold = uspec.clone()
+        unow = uspec.clone()
+        unew = paddle.empty_like(uspec)
+
+        for iter in range(nsteps):
+            self.dudtspec(unow, out=dudtspec, work=work)
+
+            if iter == 0:
+                self._semi_implicit_step(unow, unow, dudtspec, self.dt, out=unew)
+                unew.multiply_(work["hyperdiff"])
+            else:
+                self._semi_implicit_step(uold, unow, dudtspec, 2.0 * self.dt, out=unew)
+                # hyperdiffusion over the leapfrog interval of two steps
+                unew.multiply_(work["hyperdiff"])
+                unew.multiply_(work["hyperdiff"])
+
+                # robert-asselin filter of the current state
+                uold.add_(unew, alpha=1.0)
+                uold.add_(unow, alpha=-2.0)
+                unow.add_(uold, alpha=self.robert_filter)
+
+            # cycle through the buffers
+            uold, unow, unew = unow, unew, uold
+
+        return unow
+
     def integrate_grid(self, ugrid, dimensionless=False, polar_opt=0):
         dlon = 2 * np.pi / self.nlon
         radius = 1 if dimensionless else self.radius
@@ -66,23 +66,24 @@ def legpoly(mmax, lmax, x, norm="ortho", inverse=False, csphase=True):
         vdm[l, l, :] = np.sqrt( (2*l + 1) * (1 + x) * (1 - x) / 2 / l ) * vdm[l-1, l-1, :]
 
     # fill the remaining values on the upper triangle and multiply b
+    # the recursion is advanced along l and carried out for all orders m < l-1 at once
     for l in range(2, nmax):
-        for m in range(0, l-1):
-            vdm[m, l, :] = x * np.sqrt((2*l - 1) / (l - m) * (2*l + 1) / (l + m)) * vdm[m, l-1, :] \
-                            - np.sqrt((l + m - 1) / (l - m) * (2*l + 1) / (2*l - 3) * (l - m - 1) / (l + m)) * vdm[m, l-2, :]
+        m = np.arange(0, l-1).reshape(-1, 1)
+        a = np.sqrt((2*l - 1) / (l - m) * (2*l + 1) / (l + m))
+        b = np.sqrt((l + m - 1) / (l - m) * (2*l + 1) / (2*l - 3) * (l - m - 1) / (l + m))
+        vdm[:l-1, l, :] = x * a * vdm[:l-1, l-1, :] - b * vdm[:l-1, l-2, :]
 
     if norm == "schmidt":
-        for l in range(0, nmax):
-            if inverse:
-                vdm[:, l, : ] = vdm[:, l, : ] * np.sqrt(2*l + 1)
-            else:
-                vdm[:, l, : ] = vdm[:, l, : ] / np.sqrt(2*l + 1)
+        l = np.arange(0, nmax).reshape(-1, 1)
+        if inverse:
+            vdm *= np.sqrt(2*l + 1)
+        else:
+            vdm /= np.sqrt(2*l + 1)
 
     vdm = vdm[:mmax, :lmax]
 
     if csphase:
-        for m in range(1, mmax, 2):
-            vdm[m] *= -1
+        vdm[1::2] *= -1
 
     return vdm
 
@@ -116,15 +117,16 @@ def _precompute_dlegpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=Tru
 
     dpct = np.zeros((2, mmax, lmax, len(t)), dtype=np.float64)
 
-    # fill the derivative terms wrt theta
+    # fill the derivative terms wrt theta, vectorized over the orders m
     for l in range(0, lmax):
 
         # m = 0
         dpct[0, 0, l] = - np.sqrt(l*(l+1)) * pct[1, l]
 
         # 0 < m < l
-        for m in range(1, min(l, mmax)):
-            dpct[0, m, l] = 0.5 * ( np.sqrt((l+m)*(l-m+1)) * pct[m-1, l] - np.sqrt((l-m)*(l+m+1)) * pct[m+1, l] )
+        mu = max(min(l, mmax), 1)
+        m = np.arange(1, mu).reshape(-1, 1)
+        dpct[0, 1:mu, l] = 0.5 * ( np.sqrt((l+m)*(l-m+1)) * pct[0:mu-1, l] - np.sqrt((l-m)*(l+m+1)) * pct[2:mu+1, l] )
 
         # m == l
         if mmax > l:
@@ -132,14 +134,14 @@ def _precompute_dlegpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=Tru
 
         # fill the - 1j m P^m_l / sin(phi). as this component is purely imaginary,
         # we won't store it explicitly in a complex array
-        for m in range(1, min(l+1, mmax)):
-            # this component is implicitly complex
-            # we do not divide by m here as this cancels with the derivative of the exponential
-            dpct[1, m, l] = 0.5 * np.sqrt((2*l+1)/(2*l+3)) * \
-                ( np.sqrt((l-m+1)*(l-m+2)) * pct[m-1, l+1] + np.sqrt((l+m+1)*(l+m+2)) * pct[m+1, l+1] )
+        # this component is implicitly complex
+        # we do not divide by m here as this cancels with the derivative of the exponential
+        mu = min(l+1, mmax)
+        m = np.arange(1, mu).reshape(-1, 1)
+        dpct[1, 1:mu, l] = 0.5 * np.sqrt((2*l+1)/(2*l+3)) * \
+            ( np.sqrt((l-m+1)*(l-m+2)) * pct[0:mu-1, l+1] + np.sqrt((l+m+1)*(l+m+2)) * pct[2:mu+1, l+1] )
 
     if csphase:
-        for m in range(1, mmax, 2):
-            dpct[:, m] *= -1
+        dpct[:, 1::2] *= -1
 
     return dpct
\ No newline at end of file
@@ -29,6 +29,8 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+import math
+
 import numpy as np
 
 def _precompute_grid(n, grid="equidistant", a=0.0, b=1.0, periodic=False):
@@ -78,13 +80,127 @@ def trapezoidal_weights(n, a=-1.0, b=1.0, periodic=False):
 
     return xlg, wlg
 
-def legendre_gauss_weights(n, a=-1.0, b=1.0):
+def _legendre_recurrence(n, theta):
+    r"""
+    Evaluates P_n(\cos \theta) and its derivative with respect to theta using the three-term recurrence.
+    This costs O(n) per point and is used close to the poles, where the asymptotic expansion fails.
+    """
+
+    x = np.cos(theta)
+    p0 = np.ones_like(x)
+    p1 = x.copy()
+    for k in range(2, n+1):
+        p0, p1 = p1, ( (2*k-1) * x * p1 - (k-1) * p0 ) / k
+
+    if n == 0:
+        return p0, np.zeros_like(x)
+
+    dp = n * (x * p1 - p0) / np.sin(theta)
+
+    return p1, dp
+
+def _legendre_stieltjes(n, theta, nterms=30):
+    r"""
+    Evaluates P_n(\cos \theta) and its derivative with respect to theta in O(1) per point using the
+    asymptotic expansion of Stieltjes. Also returns a mask of the points where the truncated expansion
+    is accurate to machine precision. This follows
+
+    [1] Hale, N., Townsend, A.; Fast and accurate computation of Gauss-Legendre and Gauss-Jacobi quadrature nodes and weights; SIAM J. Sci. Comput.
+    """
+
+    # C_n = 4 / pi prod_{j=1}^n j / (j + 1/2)
+    j = np.arange(1, n+1)
+    cn = 4 / np.pi * np.exp(math.fsum(np.log1p(-1 / (2*j + 1))))
+
+    # h_{n,m} = prod_{j=1}^m (j - 1/2)^2 / (j (n + j + 1/2))
+    m = np.arange(1, nterms+1)
+    h = np.concatenate([[1.], np.cumprod((m - 0.5)**2 / (m * (n + m + 0.5)))])
+
+    s = 2 * np.sin(theta)
+    c = 2 * np.cos(theta)
+    p = np.zeros_like(theta)
+    dp = np.zeros_like(theta)
+    for m in range(nterms):
+        alpha = (n + m + 0.5) * theta - (m + 0.5) * np.pi / 2
+        scale = h[m] / s**(m + 0.5)
+        p += scale * np.cos(alpha)
+        dp -= scale * ( (n + m + 0.5) * np.sin(alpha) + (m + 0.5) * c / s * np.cos(alpha) )
+
+    # the remainder is bounded by the first omitted term
+    accurate = h[nterms] / s**nterms < 1e-17
+
+    return cn * p, cn * dp, accurate
+
+def _legendre_theta(n, theta):
+    r"""
+    Evaluates P_n(\cos \theta) and its derivative with respect to theta, using the asymptotic expansion
+    wherever it is accurate and the recurrence otherwise.
+    """
+
+    p, dp, accurate = _legendre_stieltjes(n, theta)
+    if not np.all(accurate):
+        p[~accurate], dp[~accurate] = _legendre_recurrence(n, theta[~accurate])
+
+    return p, dp
+
+# first zeros of the Bessel functions J_0 and J_1, used for the initial guesses close to the poles
+_BESSEL_J0_ZEROS = np.array([2.404825557695773, 5.520078110286311, 8.653727912911013, 11.79153443901428, 14.93091770848779,
+                             18.07106396791092, 21.21163662987926, 24.35247153074930, 27.49347913204025, 30.63460646843198])
+_BESSEL_J1_ZEROS = np.array([3.831705970207512, 7.015586669815619, 10.17346813506272, 13.32369193631422, 16.47063005087763,
+                             19.61585851046824, 22.76008438059277, 25.90367208761838, 29.04682853491686, 32.18967991097440])
+
+def _olver_guess(zeros, rho):
+    r"""
+    Olver's asymptotic approximation of the zeros closest to the pole, given the corresponding Bessel zeros.
+    """
+
+    psi = zeros / rho
+    return psi + (psi / np.tan(psi) - 1) / (8 * psi * rho**2)
+
+def legendre_gauss_weights(n, a=-1.0, b=1.0, tol=1e-15, maxiter=10):
     r"""
     Helper routine which returns the Legendre-Gauss nodes and weights
     on the interval [a, b]
+
+    For large n, the nodes are found by Newton's method in theta, starting from the initial guesses of
+    Tricomi and Olver and evaluating the Legendre polynomial with the asymptotic expansion of Stieltjes.
+    This requires O(n) operations and memory, see
+
+    [1] Hale, N., Townsend, A.; Fast and accurate computation of Gauss-Legendre and Gauss-Jacobi quadrature nodes and weights; SIAM J. Sci. Comput.
     """
 
-    xlg, wlg = np.polynomial.legendre.leggauss(n)
+    if n < 128:
+        xlg, wlg = np.polynomial.legendre.leggauss(n)
+    else:
+        # initial guesses for the nodes on the northern hemisphere
+        k = np.arange(1, (n + 1) // 2 + 1)
+        phi = (4*k - 1) * np.pi / (4*n + 2)
+        x = (1 - (n - 1) / (8 * n**3) - (39 - 28 / np.sin(phi)**2) / (384 * n**4)) * np.cos(phi)
+        theta = np.arccos(x)
+        theta[:len(_BESSEL_J0_ZEROS)] = _olver_guess(_BESSEL_J0_ZEROS, n + 0.5)
+
+        for i in range(maxiter):
+            p, dp = _legendre_theta(n, theta)
+            dtheta = p / dp
+            theta = theta - dtheta
+            # first order update of the derivative, using the Legendre differential equation
+            dp = dp + dtheta * (dp / np.tan(theta) + n * (n + 1) * p)
+            # the tolerance is applied to the nodes in x = cos(theta)
+            if np.max(np.abs(dtheta * np.sin(theta))) < tol:
+                break
+
+        tlg = np.cos(theta)
+        wlg = 2 / dp**2
+
+        # the equator is exactly a node for odd n
+        if n % 2 == 1:
+            tlg[-1] = 0.0
+
+        # mirror to the southern hemisphere and sort in ascending order
+        nhalf = n // 2
+        xlg = np.concatenate([-tlg, np.flip(tlg[:nhalf])])
+        wlg = np.concatenate([wlg, np.flip(wlg[:nhalf])])
+
     xlg = (b - a) * 0.5 * xlg + (b + a) * 0.5
     wlg = wlg * (b - a) * 0.5
 
@@ -94,8 +210,46 @@ def lobatto_weights(n, a=-1.0, b=1.0, tol=1e-16, maxiter=100):
     r"""
     Helper routine which returns the Legendre-Gauss-Lobatto nodes and weights
     on the interval [a, b]
+
+    For large n, the interior nodes are the zeros of the derivative of P_{n-1}, which are found by Newton's
+    method in theta analogous to legendre_gauss_weights.
     """
 
+    if n >= 128:
+        N = n - 1
+
+        # initial guesses for the interior nodes on the northern hemisphere
+        k = np.arange(1, (n - 1) // 2 + 1)
+        theta = (k + 0.25) * np.pi / (N + 0.5)
+        theta[:len(_BESSEL_J1_ZEROS)] = _olver_guess(_BESSEL_J1_ZEROS, N + 0.5)
+
+        for i in range(maxiter):
+            p, dp = _legendre_theta(N, theta)
+            ddp = - dp / np.tan(theta) - N * (N + 1) * p
+            dtheta = dp / ddp
+            theta = theta - dtheta
+            # the tolerance is applied to the nodes in x = cos(theta) and limited by the rounding of the recurrence
+            if np.max(np.abs(dtheta * np.sin(theta))) < max(tol, 1e-15):
+                break
+
+        tlg = np.cos(theta)
+        wlg = 2.0 / (n * (n - 1) * p**2)
+
+        # the equator is exactly a node for odd n
+        if n % 2 == 1:
+            tlg[-1] = 0.0
+
+        # add the endpoints, mirror to the southern hemisphere and sort in ascending order
+        nhalf = (n - 2) // 2
+        tlg = np.concatenate([[-1.0], -tlg, np.flip(tlg[:nhalf]), [1.0]])
+        wlg = np.concatenate([[2.0 / (n * (n - 1))], wlg, np.flip(wlg[:nhalf]), [2.0 / (n * (n - 1))]])
+
+        # rescale
+        tlg = (b - a) * 0.5 * tlg + (b + a) * 0.5
+        wlg = wlg * (b - a) * 0.5
+
+        return tlg, wlg
+
     wlg = np.zeros((n,))
     tlg = np.zeros((n,))
     tmp = np.zeros((n,))
@@ -34,12 +34,51 @@ import paddle
 import paddle.fft
 import paddle.nn as nn
 
+from paddle_harmonics._legendre_contraction import _blocked_legendre_contraction
+from paddle_harmonics._legendre_contraction import _blocked_legendre_expansion
+from paddle_harmonics._legendre_contraction import _cast_buffer
+from paddle_harmonics._legendre_contraction import _combine_vector_components
+from paddle_harmonics._legendre_contraction import _combine_vector_components_adjoint
+from paddle_harmonics._legendre_contraction import _fold_hemispheres
+from paddle_harmonics._legendre_contraction import _get_blocks
+from paddle_harmonics._legendre_contraction import _interleave_parity
+from paddle_harmonics._legendre_contraction import _is_equatorially_symmetric
+from paddle_harmonics._legendre_contraction import _legendre_blocks
+from paddle_harmonics._legendre_contraction import _parity_sign
+from paddle_harmonics._legendre_contraction import _polar_blocks
+from paddle_harmonics._legendre_contraction import _polar_truncation_error
+from paddle_harmonics._legendre_contraction import _register_blocks
+from paddle_harmonics._legendre_contraction import _select_component
+from paddle_harmonics._legendre_contraction import _split_parity
+from paddle_harmonics._legendre_contraction import _unfold_hemispheres
+from paddle_harmonics._legendre_recursion import _get_chunks
+from paddle_harmonics._legendre_recursion import _on_the_fly_legendre_contraction
+from paddle_harmonics._legendre_recursion import _on_the_fly_legendre_expansion
+from paddle_harmonics._legendre_recursion import _register_recursion
+from paddle_harmonics._sht_autograd import _apply_linear_transform
+from paddle_harmonics._sht_autograd import _irfft_adjoint
+from paddle_harmonics._sht_autograd import _rfft_adjoint
+from paddle_harmonics.cache import cached
 from paddle_harmonics.legendre import _precompute_dlegpoly
 from paddle_harmonics.legendre import _precompute_legpoly
 from paddle_harmonics.quadrature import clenshaw_curtiss_weights
 from paddle_harmonics.quadrature import legendre_gauss_weights
 from paddle_harmonics.quadrature import lobatto_weights
 
+_quadrature_rules = {
+    "legendre-gauss": legendre_gauss_weights,
+    "lobatto": lobatto_weights,
+    "equiangular": clenshaw_curtiss_weights,
+}
+
+
+def _precompute_quadrature(grid, nlat):
+    r"""
+    Computes the quadrature nodes and weights on [-1, 1], reusing them from the precomputation cache
+    """
+    rule = _quadrature_rules[grid]
+    return cached(("quadrature", grid, nlat), lambda: rule(nlat, -1, 1), persistent=True)
+
 
 class RealSHT(nn.Layer):
     r"""
@@ -52,7 +91,18 @@ class RealSHT(nn.Layer):
     """
 
     def __init__(
-        self, nlat, nlon, lmax=None, mmax=None, grid="lobatto", norm="ortho", csphase=True
+        self,
+        nlat,
+        nlon,
+        lmax=None,
+        mmax=None,
+        grid="lobatto",
+        norm="ortho",
+        csphase=True,
+        parity_split=False,
+        triangular=False,
+        on_the_fly=False,
+        polar_threshold=None,
     ):
         r"""
         Initializes the SHT Layer, precomputing the necessary quadrature weights
@@ -61,6 +111,11 @@ class RealSHT(nn.Layer):
         nlat: input grid resolution in the latitudinal direction
         nlon: input grid resolution in the longitudinal direction
         grid: grid in the latitude direction (for now only tensor product grids are supported)
+        parity_split: exploit the equatorial symmetry of the Legendre polynomials to halve the cost of the contraction
+        triangular: store the Legendre weights in blocks of orders m, skipping the vanishing entries l < m
+        on_the_fly: regenerate the Legendre weights by recursion during the forward pass instead of storing them
+        polar_threshold: skip the polar latitudes where the Legendre weights of an order m fall below this fraction of their maximum.
+            The relative size of the discarded weights is reported in the attribute polar_error
         """
 
         super().__init__()
@@ -70,18 +125,23 @@ class RealSHT(nn.Layer):
         self.grid = grid
         self.norm = norm
         self.csphase = csphase
+        self.parity_split = parity_split
+        self.triangular = triangular
+        self.on_the_fly = on_the_fly
+        self.polar_threshold = polar_threshold
+        self.polar_error = 0.0
 
         # TODO: include assertions regarding the dimensions
 
         # compute quadrature points
         if self.grid == "legendre-gauss":
-            cost, w = legendre_gauss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("legendre-gauss", nlat)
             self.lmax = lmax or self.nlat
         elif self.grid == "lobatto":
-            cost, w = lobatto_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("lobatto", nlat)
             self.lmax = lmax or self.nlat - 1
         elif self.grid == "equiangular":
-            cost, w = clenshaw_curtiss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("equiangular", nlat)
             # cost, w = fejer2_weights(nlat, -1, 1)
             self.lmax = lmax or self.nlat
         else:
@@ -93,22 +153,77 @@ class RealSHT(nn.Layer):
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
 
-        # combine quadrature weights with the legendre weights
-        weights = paddle.to_tensor(w)
-        pct = _precompute_legpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
-        pct = paddle.to_tensor(pct)
-        weights = paddle.einsum("mlk,k->mlk", pct, weights)
+        if self.on_the_fly:
+            if self.parity_split or self.triangular or self.polar_threshold is not None:
+                raise ValueError(
+                    "on_the_fly cannot be combined with parity_split, triangular or polar_threshold"
+                )
 
-        # remember quadrature weights
-        self.register_buffer("weights", weights, persistable=False)
+            # only store the O(nlat * mmax) seeds of the recursion
+            _register_recursion(self, np.cos(tq), self.norm, False, self.csphase, w=w)
+            return
+
+        # combine quadrature weights with the legendre weights
+        def _precompute_weights():
+            weights = paddle.to_tensor(w)
+            pct = _precompute_legpoly(
+                self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase
+            )
+            pct = paddle.to_tensor(pct)
+            return paddle.einsum("mlk,k->mlk", pct, weights)
+
+        # only the representation used by the layer is cached, the dense weights of the blocked
+        # representations are discarded once the blocks are built
+        key = ("RealSHT", self.nlat, self.lmax, self.mmax, self.grid, self.norm, self.csphase)
+
+        if self.parity_split:
+            if not _is_equatorially_symmetric(cost, w):
+                raise ValueError(
+                    "Parity splitting requires a grid which is symmetric about the equator"
+                )
+
+            # only keep the northern hemisphere, split by the parity of l
+            def _precompute_parity_blocks():
+                weights_even, weights_odd = _split_parity(_precompute_weights())
+                blocks_even = _legendre_blocks(weights_even, self.triangular, self.polar_threshold)
+                blocks_odd = _legendre_blocks(weights_odd, self.triangular, self.polar_threshold)
+                error = _polar_truncation_error(
+                    [(weights_even, blocks_even), (weights_odd, blocks_odd)]
+                )
+                return blocks_even, blocks_odd, error
+
+            blocks_even, blocks_odd, self.polar_error = cached(
+                key + ("parity_split", self.triangular, self.polar_threshold),
+                _precompute_parity_blocks,
+                persistent=True,
+            )
+            _register_blocks(self, "weights_even", blocks_even)
+            _register_blocks(self, "weights_odd", blocks_odd)
+            self.register_buffer("msign", _parity_sign(self.mmax), persistable=False)
+        elif self.triangular or self.polar_threshold is not None:
+            blocks, self.polar_error = cached(
+                key + ("triangular", self.polar_threshold),
+                lambda: _polar_blocks(_precompute_weights(), self.polar_threshold),
+                persistent=True,
+            )
+            _register_blocks(self, "weights", blocks)
+        else:
+            # remember quadrature weights
+            weights = cached(key, _precompute_weights, persistent=True)
+            self.register_buffer("weights", weights, persistable=False)
 
     def extra_repr(self):
         r"""
         Pretty print module
         """
-        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}"
+        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}, parity_split={self.parity_split}, triangular={self.triangular}, on_the_fly={self.on_the_fly}, polar_threshold={self.polar_threshold}"
 
     def forward(self, x: paddle.Tensor):
+        # the transform is linear, so its gradient is computed by the adjoint transform instead of
+        # storing activations for the backward pass
+        return _apply_linear_transform(x, self._forward_transform, self._adjoint_transform)
+
+    def _forward_transform(self, x: paddle.Tensor):
 
         assert x.shape[-2] == self.nlat
         assert x.shape[-1] == self.nlon
@@ -119,23 +234,57 @@ class RealSHT(nn.Layer):
         # do the Legendre-Gauss quadrature
         x = paddle.as_real(x)
 
-        # distributed contraction: fork
-        out_shape = list(x.shape)
-        out_shape[-3] = self.lmax
-        out_shape[-2] = self.mmax
-        xout = paddle.zeros(out_shape, dtype=x.dtype)
-
-        # contraction
-        xout[..., 0] = paddle.einsum(
-            "...km,mlk->...lm", x[..., : self.mmax, 0], self.weights.astype(x.dtype)
-        )
-        xout[..., 1] = paddle.einsum(
-            "...km,mlk->...lm", x[..., : self.mmax, 1], self.weights.astype(x.dtype)
+        if self.parity_split:
+            # fold the hemispheres and contract each parity with the half-height weights
+            xe, xo = _fold_hemispheres(x[..., : self.mmax, :], self.msign)
+            xe = _blocked_legendre_contraction(
+                xe, _get_blocks(self, "weights_even", x.dtype), (self.lmax + 1) // 2
+            )
+            xo = _blocked_legendre_contraction(
+                xo, _get_blocks(self, "weights_odd", x.dtype), self.lmax // 2
+            )
+            return paddle.as_complex(_interleave_parity(xe, xo, self.lmax))
+
+        if self.on_the_fly:
+            x = _on_the_fly_legendre_contraction(x[..., : self.mmax, :], _get_chunks(self))
+            return paddle.as_complex(x)
+
+        if self.triangular or self.polar_threshold is not None:
+            x = _blocked_legendre_contraction(
+                x[..., : self.mmax, :], _get_blocks(self, "weights", x.dtype), self.lmax
+            )
+            return paddle.as_complex(x)
+
+        # contraction of the real and imaginary parts in one go
+        x = paddle.einsum(
+            "...kmr,mlk->...lmr", x[..., : self.mmax, :], _cast_buffer(self, "weights", x.dtype)
         )
-        x = paddle.as_complex(xout)
+        x = paddle.as_complex(x)
 
         return x
 
+    def _adjoint_transform(self, x: paddle.Tensor):
+        # the adjoint evaluates the coefficients on the grid using the forward weights
+        x = paddle.as_real(x)
+
+        if self.parity_split:
+            nhalf = (self.nlat + 1) // 2
+            xe = _blocked_legendre_expansion(
+                x[..., 0::2, :, :], _get_blocks(self, "weights_even", x.dtype), nhalf
+            )
+            xo = _blocked_legendre_expansion(
+                x[..., 1::2, :, :], _get_blocks(self, "weights_odd", x.dtype), nhalf
+            )
+            x = _unfold_hemispheres(xe, xo, self.msign, self.nlat)
+        elif self.on_the_fly:
+            x = _on_the_fly_legendre_expansion(x, _get_chunks(self))
+        elif self.triangular or self.polar_threshold is not None:
+            x = _blocked_legendre_expansion(x, _get_blocks(self, "weights", x.dtype), self.nlat)
+        else:
+            x = paddle.einsum("...lmr,mlk->...kmr", x, _cast_buffer(self, "weights", x.dtype))
+
+        return _rfft_adjoint(x, self.nlon)
+
 
 class InverseRealSHT(nn.Layer):
     r"""
@@ -143,13 +292,25 @@ class InverseRealSHT(nn.Layer):
     Precomputes Legendre Gauss nodes, weights and associated Legendre polynomials on these nodes.
     nlat, nlon: Output dimensions
     lmax, mmax: Input dimensions (spherical coefficients). For convenience, these are inferred from the output dimensions
+    parity_split, triangular, on_the_fly, polar_threshold: evaluation strategies for the Legendre weights, see RealSHT
 
     [1] Schaeffer, N. Efficient spherical harmonic transforms aimed at pseudospectral numerical simulations, G3: Geochemistry, Geophysics, Geosystems.
     [2] Wang, B., Wang, L., Xie, Z.; Accurate calculation of spherical and vector spherical harmonic expansions via spectral element grids; Adv Comput Math.
     """
 
     def __init__(
-        self, nlat, nlon, lmax=None, mmax=None, grid="lobatto", norm="ortho", csphase=True
+        self,
+        nlat,
+        nlon,
+        lmax=None,
+        mmax=None,
+        grid="lobatto",
+        norm="ortho",
+        csphase=True,
+        parity_split=False,
+        triangular=False,
+        on_the_fly=False,
+        polar_threshold=None,
     ):
 
         super().__init__()
@@ -159,16 +320,21 @@ class InverseRealSHT(nn.Layer):
         self.grid = grid
         self.norm = norm
         self.csphase = csphase
+        self.parity_split = parity_split
+        self.triangular = triangular
+        self.on_the_fly = on_the_fly
+        self.polar_threshold = polar_threshold
+        self.polar_error = 0.0
 
         # compute quadrature points
         if self.grid == "legendre-gauss":
-            cost, _ = legendre_gauss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("legendre-gauss", nlat)
             self.lmax = lmax or self.nlat
         elif self.grid == "lobatto":
-            cost, _ = lobatto_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("lobatto", nlat)
             self.lmax = lmax or self.nlat - 1
         elif self.grid == "equiangular":
-            cost, _ = clenshaw_curtiss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("equiangular", nlat)
             self.lmax = lmax or self.nlat
         else:
             raise (ValueError("Unknown quadrature mode"))
@@ -179,21 +345,78 @@ class InverseRealSHT(nn.Layer):
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
 
-        pct = _precompute_legpoly(
-            self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase
+        if self.on_the_fly:
+            if self.parity_split or self.triangular or self.polar_threshold is not None:
+                raise ValueError(
+                    "on_the_fly cannot be combined with parity_split, triangular or polar_threshold"
+                )
+
+            # only store the O(nlat * mmax) seeds of the recursion
+            _register_recursion(self, np.cos(t), self.norm, True, self.csphase)
+            return
+
+        def _precompute_pct():
+            pct = _precompute_legpoly(
+                self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase
+            )
+            return paddle.to_tensor(pct)
+
+        key = (
+            "InverseRealSHT",
+            self.nlat,
+            self.lmax,
+            self.mmax,
+            self.grid,
+            self.norm,
+            self.csphase,
         )
-        pct = paddle.to_tensor(pct)
 
-        # register buffer
-        self.register_buffer("pct", pct, persistable=False)
+        if self.parity_split:
+            if not _is_equatorially_symmetric(cost, w):
+                raise ValueError(
+                    "Parity splitting requires a grid which is symmetric about the equator"
+                )
+
+            # only keep the northern hemisphere, split by the parity of l
+            def _precompute_parity_blocks():
+                pct_even, pct_odd = _split_parity(_precompute_pct())
+                blocks_even = _legendre_blocks(pct_even, self.triangular, self.polar_threshold)
+                blocks_odd = _legendre_blocks(pct_odd, self.triangular, self.polar_threshold)
+                error = _polar_truncation_error([(pct_even, blocks_even), (pct_odd, blocks_odd)])
+                return blocks_even, blocks_odd, error
+
+            blocks_even, blocks_odd, self.polar_error = cached(
+                key + ("parity_split", self.triangular, self.polar_threshold),
+                _precompute_parity_blocks,
+                persistent=True,
+            )
+            _register_blocks(self, "pct_even", blocks_even)
+            _register_blocks(self, "pct_odd", blocks_odd)
+            self.register_buffer("msign", _parity_sign(self.mmax), persistable=False)
+        elif self.triangular or self.polar_threshold is not None:
+            blocks, self.polar_error = cached(
+                key + ("triangular", self.polar_threshold),
+                lambda: _polar_blocks(_precompute_pct(), self.polar_threshold),
+                persistent=True,
+            )
+            _register_blocks(self, "pct", blocks)
+        else:
+            # register buffer
+            pct = cached(key, _precompute_pct, persistent=True)
+            self.register_buffer("pct", pct, persistable=False)
 
     def extra_repr(self):
         r"""
         Pretty print module
         """
-        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}"
+        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}, parity_split={self.parity_split}, triangular={self.triangular}, on_the_fly={self.on_the_fly}, polar_threshold={self.polar_threshold}"
 
     def forward(self, x: paddle.Tensor):
+        # the transform is linear, so its gradient is computed by the adjoint transform instead of
+        # storing activations for the backward pass
+        return _apply_linear_transform(x, self._forward_transform, self._adjoint_transform)
+
+    def _forward_transform(self, x: paddle.Tensor):
 
         assert x.shape[-2] == self.lmax
         assert x.shape[-1] == self.mmax
@@ -201,9 +424,30 @@ class InverseRealSHT(nn.Layer):
         # Evaluate associated Legendre functions on the output nodes
         x = paddle.as_real(x)
 
-        rl = paddle.einsum("...lm, mlk->...km", x[..., 0], self.pct.astype(x.dtype))
-        im = paddle.einsum("...lm, mlk->...km", x[..., 1], self.pct.astype(x.dtype))
-        xs = paddle.stack((rl, im), -1)
+        if self.parity_split:
+            # evaluate even and odd degrees on the northern hemisphere and unfold
+            nhalf = (self.nlat + 1) // 2
+            xe = _blocked_legendre_expansion(
+                x[..., 0::2, :, :], _get_blocks(self, "pct_even", x.dtype), nhalf
+            )
+            xo = _blocked_legendre_expansion(
+                x[..., 1::2, :, :], _get_blocks(self, "pct_odd", x.dtype), nhalf
+            )
+            xs = _unfold_hemispheres(xe, xo, self.msign, self.nlat)
+            x = paddle.as_complex(xs)
+            return paddle.fft.irfft(x, n=self.nlon, axis=-1, norm="forward")
+
+        if self.on_the_fly:
+            xs = _on_the_fly_legendre_expansion(x, _get_chunks(self))
+            x = paddle.as_complex(xs)
+            return paddle.fft.irfft(x, n=self.nlon, axis=-1, norm="forward")
+
+        if self.triangular or self.polar_threshold is not None:
+            xs = _blocked_legendre_expansion(x, _get_blocks(self, "pct", x.dtype), self.nlat)
+            x = paddle.as_complex(xs)
+            return paddle.fft.irfft(x, n=self.nlon, axis=-1, norm="forward")
+
+        xs = paddle.einsum("...lmr,mlk->...kmr", x, _cast_buffer(self, "pct", x.dtype))
 
         # apply the inverse (real) FFT
         x = paddle.as_complex(xs)
@@ -211,6 +455,28 @@ class InverseRealSHT(nn.Layer):
 
         return x
 
+    def _adjoint_transform(self, x: paddle.Tensor):
+        # the adjoint integrates the signal over the latitudes using the inverse weights
+        x = _irfft_adjoint(x, self.mmax)
+
+        if self.parity_split:
+            xe, xo = _fold_hemispheres(x, self.msign)
+            xe = _blocked_legendre_contraction(
+                xe, _get_blocks(self, "pct_even", x.dtype), (self.lmax + 1) // 2
+            )
+            xo = _blocked_legendre_contraction(
+                xo, _get_blocks(self, "pct_odd", x.dtype), self.lmax // 2
+            )
+            x = _interleave_parity(xe, xo, self.lmax)
+        elif self.on_the_fly:
+            x = _on_the_fly_legendre_contraction(x, _get_chunks(self))
+        elif self.triangular or self.polar_threshold is not None:
+            x = _blocked_legendre_contraction(x, _get_blocks(self, "pct", x.dtype), self.lmax)
+        else:
+            x = paddle.einsum("...kmr,mlk->...lmr", x, _cast_buffer(self, "pct", x.dtype))
+
+        return paddle.as_complex(x)
+
 
 class RealVectorSHT(nn.Layer):
     r"""
@@ -223,7 +489,16 @@ class RealVectorSHT(nn.Layer):
     """
 
     def __init__(
-        self, nlat, nlon, lmax=None, mmax=None, grid="lobatto", norm="ortho", csphase=True
+        self,
+        nlat,
+        nlon,
+        lmax=None,
+        mmax=None,
+        grid="lobatto",
+        norm="ortho",
+        csphase=True,
+        triangular=False,
+        polar_threshold=None,
     ):
         r"""
         Initializes the vector SHT Layer, precomputing the necessary quadrature weights
@@ -232,6 +507,8 @@ class RealVectorSHT(nn.Layer):
         nlat: input grid resolution in the latitudinal direction
         nlon: input grid resolution in the longitudinal direction
         grid: type of grid the data lives on
+        triangular: store the Legendre weights in blocks of orders m, skipping the vanishing entries l < m
+        polar_threshold: skip the polar latitudes where the Legendre weights are negligible, see RealSHT
         """
 
         super().__init__()
@@ -241,16 +518,19 @@ class RealVectorSHT(nn.Layer):
         self.grid = grid
         self.norm = norm
         self.csphase = csphase
+        self.triangular = triangular
+        self.polar_threshold = polar_threshold
+        self.polar_error = 0.0
 
         # compute quadrature points
         if self.grid == "legendre-gauss":
-            cost, w = legendre_gauss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("legendre-gauss", nlat)
             self.lmax = lmax or self.nlat
         elif self.grid == "lobatto":
-            cost, w = lobatto_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("lobatto", nlat)
             self.lmax = lmax or self.nlat - 1
         elif self.grid == "equiangular":
-            cost, w = clenshaw_curtiss_weights(nlat, -1, 1)
+            cost, w = _precompute_quadrature("equiangular", nlat)
             # cost, w = fejer2_weights(nlat, -1, 1)
             self.lmax = lmax or self.nlat
         else:
@@ -262,28 +542,55 @@ class RealVectorSHT(nn.Layer):
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
 
-        weights = paddle.to_tensor(w)
-        dpct = _precompute_dlegpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
-        dpct = paddle.to_tensor(dpct)
+        def _precompute_weights():
+            weights = paddle.to_tensor(w)
+            dpct = _precompute_dlegpoly(
+                self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase
+            )
+            dpct = paddle.to_tensor(dpct)
+
+            # combine integration weights, normalization factor in to one:
+            l = paddle.arange(0, self.lmax).astype(dpct.dtype)
+            norm_factor = 1.0 / l / (l + 1)
+            norm_factor[0] = 1.0
+            weights = paddle.einsum("dmlk,k,l->dmlk", dpct, weights, norm_factor)
+            # since the second component is imaginary, we need to take complex conjugation into account
+            weights[1] = -1 * weights[1]
+            return weights
 
-        # combine integration weights, normalization factor in to one:
-        l = paddle.arange(0, self.lmax).astype(dpct.dtype)
-        norm_factor = 1.0 / l / (l + 1)
-        norm_factor[0] = 1.0
-        weights = paddle.einsum("dmlk,k,l->dmlk", dpct, weights, norm_factor)
-        # since the second component is imaginary, we need to take complex conjugation into account
-        weights[1] = -1 * weights[1]
+        key = ("RealVectorSHT", self.nlat, self.lmax, self.mmax, self.grid, self.norm, self.csphase)
 
         # remember quadrature weights
-        self.register_buffer("weights", weights, persistable=False)
+        if self.triangular or self.polar_threshold is not None:
+            blocks, self.polar_error = cached(
+                key + ("triangular", self.polar_threshold),
+                lambda: _polar_blocks(_precompute_weights(), self.polar_threshold),
+                persistent=True,
+            )
+            _register_blocks(self, "weights", blocks)
+        else:
+            weights = cached(key, _precompute_weights, persistent=True)
+            self.register_buffer("weights", weights, persistable=False)
 
     def extra_repr(self):
         r"""
         Pretty print module
         """
-        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}"
+        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}, triangular={self.triangular}, polar_threshold={self.polar_threshold}"
 
     def forward(self, x: paddle.Tensor):
+        # the fused contraction adds two dimensions, so the batch dimensions are flattened to stay
+        # within the supported tensor rank
+        batch_shape = x.shape[:-3]
+        x = x.reshape([-1] + x.shape[-3:])
+
+        # the transform is linear, so its gradient is computed by the adjoint transform instead of
+        # storing activations for the backward pass
+        x = _apply_linear_transform(x, self._forward_transform, self._adjoint_transform)
+
+        return x.reshape(batch_shape + x.shape[-3:])
+
+    def _forward_transform(self, x: paddle.Tensor):
 
         assert len(x.shape) >= 3
 
@@ -293,42 +600,42 @@ class RealVectorSHT(nn.Layer):
         # do the Legendre-Gauss quadrature
         x = paddle.as_real(x)
 
-        # distributed contraction: fork
-        out_shape = list(x.shape)
-        out_shape[-3] = self.lmax
-        out_shape[-2] = self.mmax
-        xout = paddle.zeros(out_shape, dtype=x.dtype)
-
-        # contraction - spheroidal component
-        # real component
-        xout[..., 0, :, :, 0] = paddle.einsum(
-            "...km,mlk->...lm", x[..., 0, :, : self.mmax, 0], self.weights[0].to(x.dtype)
-        ) - paddle.einsum(
-            "...km,mlk->...lm", x[..., 1, :, : self.mmax, 1], self.weights[1].to(x.dtype)
+        if self.triangular or self.polar_threshold is not None:
+            # apply both components of the weights to both components of the signal
+            blocks = _get_blocks(self, "weights", x.dtype)
+            x0 = _blocked_legendre_contraction(
+                x[..., : self.mmax, :], _select_component(blocks, 0), self.lmax
+            )
+            x1 = _blocked_legendre_contraction(
+                x[..., : self.mmax, :], _select_component(blocks, 1), self.lmax
+            )
+
+            return paddle.as_complex(_combine_vector_components(x0, x1))
+
+        # contract both components of the signal with both components of the weights at once
+        x = paddle.einsum(
+            "...ckmr,dmlk->...dclmr", x[..., : self.mmax, :], _cast_buffer(self, "weights", x.dtype)
         )
+        x = _combine_vector_components(x[..., 0, :, :, :, :], x[..., 1, :, :, :, :])
 
-        # iamg component
-        xout[..., 0, :, :, 1] = paddle.einsum(
-            "...km,mlk->...lm", x[..., 0, :, : self.mmax, 1], self.weights[0].to(x.dtype)
-        ) + paddle.einsum(
-            "...km,mlk->...lm", x[..., 1, :, : self.mmax, 0], self.weights[1].to(x.dtype)
-        )
+        return paddle.as_complex(x)
 
-        # contraction - toroidal component
-        # real component
-        xout[..., 1, :, :, 0] = -paddle.einsum(
-            "...km,mlk->...lm", x[..., 0, :, : self.mmax, 1], self.weights[1].to(x.dtype)
-        ) - paddle.einsum(
-            "...km,mlk->...lm", x[..., 1, :, : self.mmax, 0], self.weights[0].to(x.dtype)
-        )
-        # imag component
-        xout[..., 1, :, :, 1] = paddle.einsum(
-            "...km,mlk->...lm", x[..., 0, :, : self.mmax, 0], self.weights[1].to(x.dtype)
-        ) - paddle.einsum(
-            "...km,mlk->...lm", x[..., 1, :, : self.mmax, 1], self.weights[0].to(x.dtype)
-        )
+    def _adjoint_transform(self, x: paddle.Tensor):
+        x0, x1 = _combine_vector_components_adjoint(paddle.as_real(x))
 
-        return paddle.as_complex(xout)
+        if self.triangular or self.polar_threshold is not None:
+            blocks = _get_blocks(self, "weights", x0.dtype)
+            x = _blocked_legendre_expansion(
+                x0, _select_component(blocks, 0), self.nlat
+            ) + _blocked_legendre_expansion(x1, _select_component(blocks, 1), self.nlat)
+        else:
+            x = paddle.einsum(
+                "...dclmr,dmlk->...ckmr",
+                paddle.stack((x0, x1), -5),
+                _cast_buffer(self, "weights", x0.dtype),
+            )
+
+        return _rfft_adjoint(x, self.nlon)
 
 
 class InverseRealVectorSHT(nn.Layer):
@@ -341,7 +648,16 @@ class InverseRealVectorSHT(nn.Layer):
     """
 
     def __init__(
-        self, nlat, nlon, lmax=None, mmax=None, grid="lobatto", norm="ortho", csphase=True
+        self,
+        nlat,
+        nlon,
+        lmax=None,
+        mmax=None,
+        grid="lobatto",
+        norm="ortho",
+        csphase=True,
+        triangular=False,
+        polar_threshold=None,
     ):
 
         super().__init__()
@@ -351,16 +667,19 @@ class InverseRealVectorSHT(nn.Layer):
         self.grid = grid
         self.norm = norm
         self.csphase = csphase
+        self.triangular = triangular
+        self.polar_threshold = polar_threshold
+        self.polar_error = 0.0
 
         # compute quadrature points
         if self.grid == "legendre-gauss":
-            cost, _ = legendre_gauss_weights(nlat, -1, 1)
+            cost, _ = _precompute_quadrature("legendre-gauss", nlat)
             self.lmax = lmax or self.nlat
         elif self.grid == "lobatto":
-            cost, _ = lobatto_weights(nlat, -1, 1)
+            cost, _ = _precompute_quadrature("lobatto", nlat)
             self.lmax = lmax or self.nlat - 1
         elif self.grid == "equiangular":
-            cost, _ = clenshaw_curtiss_weights(nlat, -1, 1)
+            cost, _ = _precompute_quadrature("equiangular", nlat)
             self.lmax = lmax or self.nlat
         else:
             raise (ValueError("Unknown quadrature mode"))
@@ -371,21 +690,53 @@ class InverseRealVectorSHT(nn.Layer):
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
 
-        dpct = _precompute_dlegpoly(
-            self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase
+        def _precompute_dpct():
+            dpct = _precompute_dlegpoly(
+                self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase
+            )
+            return paddle.to_tensor(dpct)
+
+        key = (
+            "InverseRealVectorSHT",
+            self.nlat,
+            self.lmax,
+            self.mmax,
+            self.grid,
+            self.norm,
+            self.csphase,
         )
-        dpct = paddle.to_tensor(dpct)
 
         # register weights
-        self.register_buffer("dpct", dpct, persistable=False)
+        if self.triangular or self.polar_threshold is not None:
+            blocks, self.polar_error = cached(
+                key + ("triangular", self.polar_threshold),
+                lambda: _polar_blocks(_precompute_dpct(), self.polar_threshold),
+                persistent=True,
+            )
+            _register_blocks(self, "dpct", blocks)
+        else:
+            dpct = cached(key, _precompute_dpct, persistent=True)
+            self.register_buffer("dpct", dpct, persistable=False)
 
     def extra_repr(self):
         r"""
         Pretty print module
         """
-        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}"
+        return f"nlat={self.nlat}, nlon={self.nlon},\n lmax={self.lmax}, mmax={self.mmax},\n grid={self.grid}, csphase={self.csphase}, triangular={self.triangular}, polar_threshold={self.polar_threshold}"
 
     def forward(self, x: paddle.Tensor):
+        # the fused contraction adds two dimensions, so the batch dimensions are flattened to stay
+        # within the supported tensor rank
+        batch_shape = x.shape[:-3]
+        x = x.reshape([-1] + x.shape[-3:])
+
+        # the transform is linear, so its gradient is computed by the adjoint transform instead of
+        # storing activations for the backward pass
+        x = _apply_linear_transform(x, self._forward_transform, self._adjoint_transform)
+
+        return x.reshape(batch_shape + x.shape[-3:])
+
+    def _forward_transform(self, x: paddle.Tensor):
 
         assert x.shape[-2] == self.lmax
         assert x.shape[-1] == self.mmax
@@ -393,33 +744,38 @@ class InverseRealVectorSHT(nn.Layer):
         # Evaluate associated Legendre functions on the output nodes
         x = paddle.as_real(x)
 
-        # contraction - spheroidal component
-        # real component
-        srl = paddle.einsum(
-            "...lm,mlk->...km", x[..., 0, :, :, 0], self.dpct[0].to(x.dtype)
-        ) - paddle.einsum("...lm,mlk->...km", x[..., 1, :, :, 1], self.dpct[1].to(x.dtype))
-        # iamg component
-        sim = paddle.einsum(
-            "...lm,mlk->...km", x[..., 0, :, :, 1], self.dpct[0].to(x.dtype)
-        ) + paddle.einsum("...lm,mlk->...km", x[..., 1, :, :, 0], self.dpct[1].to(x.dtype))
-
-        # contraction - toroidal component
-        # real component
-        trl = -paddle.einsum(
-            "...lm,mlk->...km", x[..., 0, :, :, 1], self.dpct[1].to(x.dtype)
-        ) - paddle.einsum("...lm,mlk->...km", x[..., 1, :, :, 0], self.dpct[0].to(x.dtype))
-        # imag component
-        tim = paddle.einsum(
-            "...lm,mlk->...km", x[..., 0, :, :, 0], self.dpct[1].to(x.dtype)
-        ) - paddle.einsum("...lm,mlk->...km", x[..., 1, :, :, 1], self.dpct[0].to(x.dtype))
+        if self.triangular or self.polar_threshold is not None:
+            # apply both components of the weights to both components of the coefficients
+            blocks = _get_blocks(self, "dpct", x.dtype)
+            x0 = _blocked_legendre_expansion(x, _select_component(blocks, 0), self.nlat)
+            x1 = _blocked_legendre_expansion(x, _select_component(blocks, 1), self.nlat)
+        else:
+            # contract both components of the coefficients with both components of the weights at once
+            x = paddle.einsum("...clmr,dmlk->...dckmr", x, _cast_buffer(self, "dpct", x.dtype))
+            x0, x1 = x[..., 0, :, :, :, :], x[..., 1, :, :, :, :]
 
         # reassemble
-        s = paddle.stack((srl, sim), -1)
-        t = paddle.stack((trl, tim), -1)
-        xs = paddle.stack((s, t), -4)
+        xs = _combine_vector_components(x0, x1)
 
         # apply the inverse (real) FFT
         x = paddle.as_complex(xs)
         x = paddle.fft.irfft(x, n=self.nlon, axis=-1, norm="forward")
 
         return x
+
+    def _adjoint_transform(self, x: paddle.Tensor):
+        x0, x1 = _combine_vector_components_adjoint(_irfft_adjoint(x, self.mmax))
+
+        if self.triangular or self.polar_threshold is not None:
+            blocks = _get_blocks(self, "dpct", x0.dtype)
+            x = _blocked_legendre_contraction(
+                x0, _select_component(blocks, 0), self.lmax
+            ) + _blocked_legendre_contraction(x1, _select_component(blocks, 1), self.lmax)
+        else:
+            x = paddle.einsum(
+                "...dckmr,dmlk->...clmr",
+                paddle.stack((x0, x1), -5),
+                _cast_buffer(self, "dpct", x0.dtype),
+            )
+
+        return paddle.as_complex(x)
@@ -32,6 +32,7 @@
 import math
 import unittest
 from functools import partial
+from unittest import mock
 
 import numpy as np
 import paddle
@@ -39,7 +40,11 @@ from parameterized import parameterized
 
 from paddle_harmonics import DiscreteContinuousConvS2
 from paddle_harmonics import DiscreteContinuousConvTransposeS2
+from paddle_harmonics import _disco_convolution
+from paddle_harmonics import convolution
 from paddle_harmonics import quadrature
+from paddle_harmonics._disco_convolution import _disco_s2_contraction_paddle
+from paddle_harmonics._disco_convolution import _disco_s2_transpose_contraction_paddle
 from paddle_harmonics.utils import paddle_aux  # noqa, for reshape
 
 
@@ -53,7 +58,7 @@ def _compute_vals_isotropic(
     # compute the support
     dtheta = (theta_cutoff - 0.0) / ntheta
     ikernel = paddle.arange(ntheta).reshape(-1, 1, 1)
-    itheta = ikernel * dtheta
+    itheta = ikernel.astype(theta.dtype) * dtheta
 
     norm_factor = (
         2
@@ -86,8 +91,8 @@ def _compute_vals_anisotropic(
     dphi = 2.0 * math.pi / nphi
     kernel_size = (ntheta - 1) * nphi + 1
     ikernel = paddle.arange(kernel_size).reshape(-1, 1, 1)
-    itheta = ((ikernel - 1) // nphi + 1) * dtheta
-    iphi = ((ikernel - 1) % nphi) * dphi
+    itheta = ((ikernel - 1) // nphi + 1).astype(theta.dtype) * dtheta
+    iphi = ((ikernel - 1) % nphi).astype(phi.dtype) * dphi
 
     norm_factor = (
         2
@@ -148,15 +153,13 @@ def _precompute_convolution_tensor_dense(
     nlat_out, nlon_out = out_shape
 
     lats_in, _ = quadrature._precompute_latitudes(nlat_in, grid=grid_in)  # noqa
-    lats_in = paddle.to_tensor(lats_in).astype("float32")
+    lats_in = paddle.to_tensor(lats_in, dtype="float64")
     lats_out, _ = quadrature._precompute_latitudes(nlat_out, grid=grid_out)  # noqa
-    lats_out = paddle.to_tensor(lats_out).astype(
-        "float32"
-    )  # array for accumulating non-zero indices
+    lats_out = paddle.to_tensor(lats_out, dtype="float64")
 
     # compute the phi differences. We need to make the linspace exclusive to not double the last point
-    lons_in = paddle.linspace(0, 2 * math.pi, nlon_in + 1)[:-1]
-    lons_out = paddle.linspace(0, 2 * math.pi, nlon_out + 1)[:-1]
+    lons_in = paddle.linspace(0, 2 * math.pi, nlon_in + 1, dtype="float64")[:-1]
+    lons_out = paddle.linspace(0, 2 * math.pi, nlon_out + 1, dtype="float64")[:-1]
 
     out = paddle.zeros(shape=[kernel_size, nlat_out, nlon_out, nlat_in, nlon_in])
 
@@ -183,12 +186,15 @@ def _precompute_convolution_tensor_dense(
             y = y / norm
             z = z / norm
 
+            # roundoff can still push z out of [-1, 1] at coinciding grid points
+            z = paddle.clip(z, -1.0, 1.0)
+
             # compute spherical coordinates
             theta = paddle.acos(z)
             phi = paddle.atan2(y, x) + np.pi
 
             # find the indices where the rotated position falls into the support of the kernel
-            out[:, t, p, :, :] = kernel_handle(theta, phi)
+            out[:, t, p, :, :] = kernel_handle(theta, phi).astype(out.dtype)
 
     return out
 
@@ -211,6 +217,8 @@ class TestDiscreteContinuousConvolution(unittest.TestCase):
             [8, 4, 2, (16, 32), (8, 16), [3], "equiangular", "legendre-gauss", False, 1e-5],
             [8, 4, 2, (16, 32), (8, 16), [3], "legendre-gauss", "equiangular", False, 1e-5],
             [8, 4, 2, (16, 32), (8, 16), [3], "legendre-gauss", "legendre-gauss", False, 1e-5],
+            [8, 4, 2, (17, 32), (9, 16), [2, 4], "equiangular", "equiangular", False, 1e-5],
+            [8, 4, 2, (16, 32), (9, 16), [2, 4], "legendre-gauss", "equiangular", False, 1e-5],
             # transpose convolution
             [8, 4, 2, (16, 32), (16, 32), [2], "equiangular", "equiangular", True, 1e-5],
             [8, 4, 2, (8, 16), (16, 32), [3], "equiangular", "equiangular", True, 1e-5],
@@ -219,6 +227,8 @@ class TestDiscreteContinuousConvolution(unittest.TestCase):
             [8, 4, 2, (8, 16), (16, 32), [3], "equiangular", "legendre-gauss", True, 1e-5],
             [8, 4, 2, (8, 16), (16, 32), [3], "legendre-gauss", "equiangular", True, 1e-5],
             [8, 4, 2, (8, 16), (16, 32), [3], "legendre-gauss", "legendre-gauss", True, 1e-5],
+            [8, 4, 2, (9, 16), (17, 32), [2, 4], "equiangular", "equiangular", True, 1e-5],
+            [8, 4, 2, (9, 16), (16, 32), [2, 4], "equiangular", "legendre-gauss", True, 1e-5],
         ]
     )
     def test_disco_convolution(
@@ -271,11 +281,7 @@ class TestDiscreteContinuousConvolution(unittest.TestCase):
                 theta_cutoff=theta_cutoff,
             ).to(self.device)
 
-            psi = paddle.sparse.sparse_coo_tensor(
-                conv.psi_idx,
-                conv.psi_vals,
-                shape=(conv.kernel_size, conv.nlat_out, conv.nlat_in * conv.nlon_in),
-            ).to_dense()
+            psi = conv.get_psi().to_dense()
 
             self.assertTrue(
                 paddle.allclose(psi, psi_dense[:, :, 0].reshape(-1, nlat_out, nlat_in * nlon_in))
@@ -316,6 +322,154 @@ class TestDiscreteContinuousConvolution(unittest.TestCase):
         self.assertTrue(paddle.allclose(x.grad, x_ref.grad, rtol=tol, atol=tol))
         self.assertTrue(paddle.allclose(conv.weight.grad, w_ref.grad, rtol=tol, atol=tol))
 
+    @parameterized.expand(
+        [
+            [8, 4, 2, (16, 32), (16, 32), [2], "equiangular", "equiangular", False, 1e-5],
+            [8, 4, 2, (16, 32), (8, 16), [2, 3], "legendre-gauss", "equiangular", False, 1e-5],
+            [8, 4, 2, (17, 32), (9, 16), [2, 4], "equiangular", "equiangular", False, 1e-5],
+            [8, 4, 2, (8, 16), (16, 32), [2, 3], "equiangular", "legendre-gauss", True, 1e-5],
+            [8, 4, 2, (9, 16), (17, 32), [2, 4], "equiangular", "equiangular", True, 1e-5],
+        ]
+    )
+    def test_disco_contraction_fft(
+        self,
+        batch_size,
+        in_channels,
+        out_channels,
+        in_shape,
+        out_shape,
+        kernel_shape,
+        grid_in,
+        grid_out,
+        transpose,
+        tol,
+    ):
+        Conv = DiscreteContinuousConvTransposeS2 if transpose else DiscreteContinuousConvS2
+        conv = Conv(
+            in_channels,
+            out_channels,
+            in_shape,
+            out_shape,
+            kernel_shape,
+            grid_in=grid_in,
+            grid_out=grid_out,
+        ).to(self.device)
+        conv_fft = Conv(
+            in_channels,
+            out_channels,
+            in_shape,
+            out_shape,
+            kernel_shape,
+            grid_in=grid_in,
+            grid_out=grid_out,
+            contraction="fft",
+        ).to(self.device)
+        conv_fft.set_state_dict(conv.state_dict())
+
+        paddle.seed(seed=333)
+        x = paddle.randn(shape=[batch_size, in_channels, *in_shape]).to(self.device)
+        x.stop_gradient = False
+        x_fft = x.clone().detach()
+        x_fft.stop_gradient = False
+
+        y = conv(x)
+        y_fft = conv_fft(x_fft)
+        self.assertTrue(paddle.allclose(y_fft, y, rtol=tol, atol=tol))
+
+        grad_input = paddle.randn(shape=y.shape, dtype=y.dtype)
+        y.backward(grad_input)
+        y_fft.backward(grad_input)
+        self.assertTrue(paddle.allclose(x_fft.grad, x.grad, rtol=tol, atol=tol))
+        self.assertTrue(paddle.allclose(conv_fft.weight.grad, conv.weight.grad, rtol=tol, atol=tol))
+
+    @parameterized.expand(
+        [
+            [(16, 32), (8, 16), [3], False],
+            [(16, 32), (16, 32), [2, 3], False],
+            [(8, 16), (16, 32), [2, 3], True],
+        ]
+    )
+    def test_contraction_tiles(self, in_shape, out_shape, kernel_shape, transpose):
+        Conv = DiscreteContinuousConvTransposeS2 if transpose else DiscreteContinuousConvS2
+        conv = Conv(4, 2, in_shape, out_shape, kernel_shape)
+        psi = conv.get_psi()
+        nnz = psi.indices().shape[-1]
+
+        paddle.seed(seed=333)
+        if transpose:
+            contraction = _disco_s2_transpose_contraction_paddle
+            x = paddle.randn(shape=[2, 3, conv.kernel_size, *in_shape])
+        else:
+            contraction = _disco_s2_contraction_paddle
+            x = paddle.randn(shape=[2, 3, *in_shape])
+
+        y = contraction(x, psi, out_shape[1])
+
+        # budgets of a single longitude and of tiles which do not divide the number of longitudes
+        for tile_size in [1, 3]:
+            y_tiled = contraction(x, psi, out_shape[1], memory_budget=tile_size * nnz * 6 * 4)
+            self.assertTrue(paddle.allclose(y_tiled, y, rtol=1e-5, atol=1e-6))
+
+    @parameterized.expand(
+        [
+            [(16, 32), (8, 16), [3], False],
+            [(16, 32), (16, 32), [2, 3], False],
+            [(8, 16), (16, 32), [2, 3], True],
+        ]
+    )
+    def test_contraction_memory_budget(self, in_shape, out_shape, kernel_shape, transpose):
+        Conv = DiscreteContinuousConvTransposeS2 if transpose else DiscreteContinuousConvS2
+        nlon = in_shape[1] if transpose else out_shape[1]
+
+        paddle.seed(seed=333)
+        conv = Conv(4, 4, in_shape, out_shape, kernel_shape)
+        x = paddle.randn(shape=[4, 4, *in_shape])
+        y = conv(x)
+
+        # the indices are computed once and reused by subsequent calls
+        indices = conv._contraction_indices[1]
+        self.assertTrue(paddle.equal_all(conv(x), y))
+        self.assertTrue(conv._contraction_indices[1] is indices)
+
+        # the budget of the layer is passed through to the contraction, which tiles the longitudes
+        nnz = conv.psi_idx.shape[-1]
+        conv_tiled = Conv(4, 4, in_shape, out_shape, kernel_shape, memory_budget=16 * nnz * nlon)
+        conv_tiled.set_state_dict(conv.state_dict())
+        y_tiled = conv_tiled(x)
+        tiles = conv_tiled._contraction_indices[1]
+        self.assertGreater(len(tiles if transpose else tiles[1]), 1)
+        self.assertTrue(paddle.allclose(y_tiled, y, rtol=1e-5, atol=1e-6))
+
+        # the module default is looked up at call time
+        name = "_precompute_transpose_indices" if transpose else "_precompute_contraction_indices"
+        precompute = getattr(_disco_convolution, name)
+        with mock.patch.object(_disco_convolution, "CONTRACTION_MEMORY_BUDGET", 1):
+            with mock.patch.object(_disco_convolution, name, wraps=precompute) as precompute:
+                conv_default = Conv(4, 4, in_shape, out_shape, kernel_shape)
+                conv_default.set_state_dict(conv.state_dict())
+                y_tiled = conv_default(x)
+        self.assertEqual(precompute.call_args.args[-1], 1)
+        self.assertTrue(paddle.allclose(y_tiled, y, rtol=1e-5, atol=1e-6))
+
+    @parameterized.expand(
+        [
+            [(16, 32), (8, 16), [3], "equiangular", "legendre-gauss"],
+            [(16, 32), (8, 16), [2, 3], "legendre-gauss", "equiangular"],
+        ]
+    )
+    def test_precompute_blocking(self, in_shape, out_shape, kernel_shape, grid_in, grid_out):
+        theta_cutoff = (kernel_shape[0] + 1) * np.pi / float(in_shape[0] - 1)
+        args = (in_shape, out_shape, kernel_shape, grid_in, grid_out, theta_cutoff)
+
+        idx, vals = convolution._precompute_convolution_tensor_s2(*args)
+
+        # process a single output latitude at a time
+        with mock.patch.object(convolution, "_PRECOMPUTE_BLOCK_ELEMENTS", 1):
+            idx_ref, vals_ref = convolution._precompute_convolution_tensor_s2(*args)
+
+        self.assertTrue(paddle.equal_all(idx, idx_ref))
+        self.assertTrue(paddle.allclose(vals, vals_ref))
+
 
 if __name__ == "__main__":
     unittest.main()
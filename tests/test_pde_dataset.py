@@ -0,0 +1,247 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import paddle
+
+from paddle_harmonics.examples.sfno import PdeDataset, PdeStoreDataset
+from paddle_harmonics.examples.sfno.utils.pde_dataset import RunningStatistics
+
+
+class TestRunningStatistics(unittest.TestCase):
+    def test_merge(self):
+        x = np.random.default_rng(333).normal(size=(7, 3, 4, 8))
+        stats = RunningStatistics().update(x[:2]).merge(RunningStatistics().update(x[2:]))
+
+        x = x.transpose(1, 0, 2, 3).reshape(3, -1)
+        self.assertEqual(stats.count, x.shape[-1])
+        self.assertTrue(np.allclose(stats.mean, x.mean(axis=-1)))
+        self.assertTrue(np.allclose(stats.var, x.var(axis=-1, ddof=1)))
+
+    def test_empty_state(self):
+        x = np.random.default_rng(333).normal(size=(2, 3, 4, 8))
+        stats = RunningStatistics().update(x)
+
+        # ranks without samples contribute empty statistics
+        state = json.loads(json.dumps(RunningStatistics().state_dict()))
+        self.assertEqual(state, dict(count=0, mean=None, m2=None))
+        empty = RunningStatistics.from_state_dict(state)
+        self.assertEqual(empty.count, 0)
+
+        merged = RunningStatistics().merge(empty).merge(stats).merge(empty)
+        self.assertEqual(merged.count, stats.count)
+        self.assertTrue(np.array_equal(merged.mean, stats.mean))
+        self.assertTrue(np.array_equal(merged.m2, stats.m2))
+
+
+class TestPdeDataset(unittest.TestCase):
+    def setUp(self):
+        self.kwargs = dict(dt=3600, nsteps=4, dims=(16, 32), num_examples=5)
+
+    def test_trajectory_pairs(self):
+        dataset = PdeDataset(
+            **self.kwargs, normalize=False, spinup=1, pairs_per_trajectory=3, stride=1
+        )
+
+        # consecutive pairs continue the trajectory of the first, including in a fresh process
+        samples = [dataset[i] for i in range(4)]
+        for (_, tar), (inp, _) in zip(samples[:2], samples[1:3]):
+            self.assertTrue(np.array_equal(tar.numpy(), inp.numpy()))
+        # the fourth pair starts a new trajectory
+        self.assertFalse(np.array_equal(samples[2][1].numpy(), samples[3][0].numpy()))
+
+    def test_seed(self):
+        samples = []
+        for seed in [333, 333, 334]:
+            dataset = PdeDataset(**self.kwargs, normalize=False, seed=seed)
+            samples.append([dataset[i][0].numpy() for i in range(2)])
+
+        # the main process draws from a reproducible stream
+        self.assertTrue(np.array_equal(samples[0], samples[1]))
+        self.assertFalse(np.array_equal(samples[0], samples[2]))
+
+    def test_worker_seed(self):
+        def load(epoch, worker):
+            # each worker process builds its own solver, which seeds the stream of the worker
+            dataset = PdeDataset(**self.kwargs, normalize=False, seed=333)
+            dataset.set_epoch(epoch)
+            worker_info = SimpleNamespace(id=worker, num_workers=2)
+            with mock.patch.object(paddle.io, "get_worker_info", return_value=worker_info):
+                return [dataset[i][0].numpy() for i in range(2)]
+
+        # workers draw from independent, reproducible streams
+        samples = load(0, 0)
+        self.assertTrue(np.array_equal(samples, load(0, 0)))
+        self.assertFalse(np.array_equal(samples[0], load(0, 1)[0]))
+        # the main process takes a stream of its own
+        dataset = PdeDataset(**self.kwargs, normalize=False, seed=333)
+        self.assertFalse(np.array_equal(samples[0], dataset[0][0].numpy()))
+
+        # the epoch reseeds the workers
+        samples_epoch = load(1, 0)
+        self.assertTrue(np.array_equal(samples_epoch, load(1, 0)))
+        self.assertFalse(np.array_equal(samples[0], samples_epoch[0]))
+
+    def test_epoch(self):
+        dataset = PdeDataset(**self.kwargs, normalize=False, seed=333)
+        inp_ref, _ = dataset[0]
+
+        # the epoch reseeds the training stream of the main process
+        dataset.set_epoch(1)
+        inp, _ = dataset[0]
+        self.assertFalse(np.array_equal(inp.numpy(), inp_ref.numpy()))
+
+        dataset = PdeDataset(**self.kwargs, normalize=False, seed=333)
+        dataset.set_epoch(1)
+        self.assertTrue(np.array_equal(dataset[0][0].numpy(), inp.numpy()))
+
+    def test_global_random_state(self):
+        paddle.seed(seed=333)
+        ref = paddle.randn([8])
+
+        # seeded datasets draw from generators of their own, including the prefetch thread
+        paddle.seed(seed=333)
+        dataset = PdeDataset(**self.kwargs, normalize=True, seed=333, prefetch=2)
+        for i in range(3):
+            dataset[i]
+        dataset.set_initial_condition("galewsky")
+        self.assertTrue(np.array_equal(paddle.randn([8]).numpy(), ref.numpy()))
+
+    def test_prefetch(self):
+        dataset = PdeDataset(**self.kwargs, initial_condition="galewsky", normalize=False)
+        inp_ref, tar_ref = dataset[0]
+        self.assertTrue(paddle.isfinite(tar_ref).all())
+
+        # the main thread shares the solver with the prefetch thread
+        dataset = PdeDataset(
+            **self.kwargs, initial_condition="galewsky", normalize=False, prefetch=2
+        )
+        for _ in range(4):
+            for inp, tar in [dataset[0], dataset._get_sample()]:
+                self.assertTrue(np.array_equal(inp.numpy(), inp_ref.numpy()))
+                self.assertTrue(np.array_equal(tar.numpy(), tar_ref.numpy()))
+
+        # changing the initial condition discards the prefetched samples
+        dataset.set_initial_condition("random")
+        for _ in range(3):
+            self.assertFalse(np.array_equal(dataset[0][0].numpy(), inp_ref.numpy()))
+        dataset.set_initial_condition("galewsky")
+        self.assertTrue(np.array_equal(dataset[0][0].numpy(), inp_ref.numpy()))
+
+    def test_statistics_stream(self):
+        dataset = PdeDataset(**self.kwargs, normalize=False, seed=333)
+        inp_ref, _ = dataset._get_sample()
+
+        # the statistics are drawn from their own stream and leave the training stream untouched
+        dataset = PdeDataset(**self.kwargs, normalize=True, seed=333, normalization_samples=1)
+        inp, _ = dataset._get_sample()
+        self.assertTrue(np.array_equal(inp.numpy(), inp_ref.numpy()))
+
+        stats_ref = RunningStatistics().update(inp_ref.numpy())
+        self.assertEqual(dataset.stats.count, stats_ref.count)
+        self.assertFalse(np.allclose(dataset.stats.mean, stats_ref.mean))
+
+    def test_stats_path(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stats_path = os.path.join(tmp_dir, "stats.json")
+            dataset = PdeDataset(**self.kwargs, seed=333, stats_path=stats_path)
+            self.assertEqual(os.listdir(tmp_dir), ["stats.json"])
+
+            # the statistics are reloaded instead of recomputed
+            with mock.patch.object(PdeDataset, "compute_statistics") as compute_statistics:
+                reloaded = PdeDataset(**self.kwargs, seed=334, stats_path=stats_path)
+            compute_statistics.assert_not_called()
+            self.assertTrue(np.array_equal(reloaded.stats.mean, dataset.stats.mean))
+            self.assertTrue(np.array_equal(reloaded.stats.m2, dataset.stats.m2))
+
+            # statistics of a different configuration are rejected
+            for kwargs in [dict(dt=1800), dict(nsteps=2), dict(dims=(8, 16))]:
+                with self.assertRaises(ValueError):
+                    PdeDataset(**dict(self.kwargs, **kwargs), stats_path=stats_path)
+            with self.assertRaises(ValueError):
+                PdeDataset(**self.kwargs, initial_condition="galewsky", stats_path=stats_path)
+
+    def test_store_round_trip(self):
+        paddle.seed(seed=333)
+        dataset = PdeDataset(**self.kwargs, normalize=True)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = dataset.generate(os.path.join(tmp_dir, "store"), batch_size=2)
+            store = PdeStoreDataset(path)
+
+            with open(os.path.join(path, "metadata.json"), "r") as f:
+                metadata = json.load(f)
+            self.assertEqual(metadata["num_examples"], 5)
+            self.assertEqual(len(store), 5)
+            self.assertTrue(np.allclose(metadata["inp_mean"], dataset.inp_mean.flatten().numpy()))
+            self.assertTrue(np.allclose(metadata["inp_var"], dataset.inp_var.flatten().numpy()))
+            self.assertTrue(paddle.equal_all(store.inp_mean, dataset.inp_mean).item())
+            self.assertTrue(paddle.equal_all(store.inp_var, dataset.inp_var).item())
+
+            # regenerate the same batches from the same random stream
+            paddle.seed(seed=333)
+            dataset = PdeDataset(**self.kwargs, normalize=True)
+            for start in range(0, 5, 2):
+                inp, tar = dataset._get_sample(batch_size=min(2, 5 - start))
+                inp = (inp - dataset.inp_mean) / paddle.sqrt(dataset.inp_var)
+                tar = (tar - dataset.inp_mean) / paddle.sqrt(dataset.inp_var)
+                self.assertTrue(np.array_equal(store.inp[start : start + 2], inp.numpy()))
+                self.assertTrue(np.array_equal(store.tar[start : start + 2], tar.numpy()))
+
+            # samples are views into the memory-mapped store
+            inp, tar = store[3]
+            self.assertTrue(np.shares_memory(inp, store.inp))
+            self.assertTrue(np.shares_memory(tar, store.tar))
+
+            loader = paddle.io.DataLoader(store, batch_size=2, shuffle=False)
+            for i, (inp, tar) in enumerate(loader):
+                self.assertEqual(inp.shape, [min(2, 5 - 2 * i), 3, 16, 32])
+                self.assertTrue(np.array_equal(inp.numpy(), store.inp[2 * i : 2 * i + 2]))
+                self.assertTrue(np.array_equal(tar.numpy(), store.tar[2 * i : 2 * i + 2]))
+            del store, loader
+
+    def test_store_exists(self):
+        dataset = PdeDataset(**self.kwargs, normalize=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(FileExistsError):
+                dataset.generate(tmp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# coding=utf-8
+
+# SPDX-FileCopyrightText: Copyright (c) 2022 The torch-harmonics Authors. All rights reserved.
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import unittest
+
+import numpy as np
+import paddle
+from parameterized import parameterized
+
+from paddle_harmonics.examples import SphereSolver
+
+
+class TestSphereSolver(unittest.TestCase):
+    def setUp(self):
+        paddle.seed(seed=333)
+
+    @parameterized.expand(
+        [
+            ["allen-cahn", "etdrk4", 4],
+            ["ginzburg-landau", "etdrk4", 4],
+            ["allen-cahn", "imex-rk", 2],
+            ["ginzburg-landau", "imex-rk", 2],
+        ]
+    )
+    def test_convergence_order(self, pde, integrator, order):
+        solver = SphereSolver(16, 32, 1.0, grid="equiangular", coeff=0.01)
+        uspec = paddle.tril(solver.randspec())
+
+        # reference solution at a much finer time step
+        solver.dt = 1.0 / 256
+        uref = solver.timestep(uspec, 256, pde=pde, integrator=integrator)
+
+        errors = []
+        for nsteps in [8, 16, 32]:
+            solver.dt = 1.0 / nsteps
+            u = solver.timestep(uspec, nsteps, pde=pde, integrator=integrator)
+            errors.append(paddle.abs(u - uref).max().item())
+
+        rates = np.log2(np.array(errors[:-1]) / np.array(errors[1:]))
+        self.assertTrue(np.all(np.abs(rates - order) < 0.5), f"observed rates {rates}")
+
+    @parameterized.expand([["etdrk4"], ["imex-rk"]])
+    def test_coefficient_change(self, integrator):
+        solver = SphereSolver(16, 32, 0.1, grid="equiangular", coeff=0.01)
+        uspec = solver.randspec()
+        solver.timestep(uspec, 1, integrator=integrator)
+
+        # changing the diffusion coefficient has to invalidate the cached stepping coefficients
+        solver.coeff = paddle.to_tensor(0.02, dtype=paddle.float64)
+        fresh = SphereSolver(16, 32, 0.1, grid="equiangular", coeff=0.02)
+
+        u = solver.timestep(uspec, 4, integrator=integrator)
+        uref = fresh.timestep(uspec, 4, integrator=integrator)
+        self.assertTrue(paddle.abs(u - uref).max().item() < 1e-12)
+
+    def test_unknown_arguments(self):
+        solver = SphereSolver(16, 32, 0.1, grid="equiangular")
+        uspec = solver.randspec()
+
+        with self.assertRaises(ValueError):
+            solver.timestep(uspec, 1, pde="heat")
+        with self.assertRaises(ValueError):
+            solver.timestep(uspec, 1, integrator="euler")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,7 +30,11 @@
 #
 
 import math
+import os
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
 import numpy as np
 import paddle
@@ -39,10 +43,88 @@ from parameterized import parameterized
 from paddle_harmonics import InverseRealSHT
 from paddle_harmonics import RealSHT
 from paddle_harmonics import *  # noqa
+from paddle_harmonics import cache
 
 from .gradcheck import gradcheck
 
 
+def _legpoly_loop(mmax, lmax, x, norm="ortho", inverse=False, csphase=True):
+    """
+    reference implementation of the Legendre recursion, looping over all degrees and orders
+    """
+    nmax = max(mmax, lmax)
+    vdm = np.zeros((nmax, nmax, len(x)), dtype=np.float64)
+
+    norm_factor = 1.0 if norm == "ortho" else np.sqrt(4 * np.pi)
+    norm_factor = 1.0 / norm_factor if inverse else norm_factor
+
+    vdm[0, 0, :] = norm_factor / np.sqrt(4 * np.pi)
+
+    for l in range(1, nmax):
+        vdm[l - 1, l, :] = np.sqrt(2 * l + 1) * x * vdm[l - 1, l - 1, :]
+        vdm[l, l, :] = np.sqrt((2 * l + 1) * (1 + x) * (1 - x) / 2 / l) * vdm[l - 1, l - 1, :]
+
+    for l in range(2, nmax):
+        for m in range(0, l - 1):
+            vdm[m, l, :] = (
+                x * np.sqrt((2 * l - 1) / (l - m) * (2 * l + 1) / (l + m)) * vdm[m, l - 1, :]
+                - np.sqrt((l + m - 1) / (l - m) * (2 * l + 1) / (2 * l - 3) * (l - m - 1) / (l + m))
+                * vdm[m, l - 2, :]
+            )
+
+    if norm == "schmidt":
+        for l in range(0, nmax):
+            if inverse:
+                vdm[:, l, :] = vdm[:, l, :] * np.sqrt(2 * l + 1)
+            else:
+                vdm[:, l, :] = vdm[:, l, :] / np.sqrt(2 * l + 1)
+
+    vdm = vdm[:mmax, :lmax]
+
+    if csphase:
+        for m in range(1, mmax, 2):
+            vdm[m] *= -1
+
+    return vdm
+
+
+def _dlegpoly_loop(mmax, lmax, t, norm="ortho", inverse=False, csphase=True):
+    """
+    reference implementation of the derivatives of the Legendre polynomials, looping over all orders
+    """
+    pct = _legpoly_loop(mmax + 1, lmax + 1, np.cos(t), norm=norm, inverse=inverse, csphase=False)
+
+    dpct = np.zeros((2, mmax, lmax, len(t)), dtype=np.float64)
+
+    for l in range(0, lmax):
+        dpct[0, 0, l] = -np.sqrt(l * (l + 1)) * pct[1, l]
+
+        for m in range(1, min(l, mmax)):
+            dpct[0, m, l] = 0.5 * (
+                np.sqrt((l + m) * (l - m + 1)) * pct[m - 1, l]
+                - np.sqrt((l - m) * (l + m + 1)) * pct[m + 1, l]
+            )
+
+        if mmax > l:
+            dpct[0, l, l] = np.sqrt(l / 2) * pct[l - 1, l]
+
+        for m in range(1, min(l + 1, mmax)):
+            dpct[1, m, l] = (
+                0.5
+                * np.sqrt((2 * l + 1) / (2 * l + 3))
+                * (
+                    np.sqrt((l - m + 1) * (l - m + 2)) * pct[m - 1, l + 1]
+                    + np.sqrt((l + m + 1) * (l + m + 2)) * pct[m + 1, l + 1]
+                )
+            )
+
+    if csphase:
+        for m in range(1, mmax, 2):
+            dpct[:, m] *= -1
+
+    return dpct
+
+
 class TestLegendrePolynomials(unittest.TestCase):
     def setUp(self):
         self.cml = lambda m, l: np.sqrt((2 * l + 1) / 4 / np.pi) * np.sqrt(
@@ -79,6 +161,67 @@ class TestLegendrePolynomials(unittest.TestCase):
                 diff = vdm[m, l] / self.cml(m, l) - self.pml[(m, l)](t)
                 self.assertTrue(diff.max() <= self.tol)
 
+    @parameterized.expand(
+        [
+            [12, 17, "ortho", False, True],
+            [17, 12, "ortho", True, False],
+            [16, 16, "schmidt", False, True],
+            [16, 16, "schmidt", True, False],
+            [9, 9, "four-pi", False, True],
+        ]
+    )
+    def test_legendre_recursion(self, mmax, lmax, norm, inverse, csphase):
+        from paddle_harmonics.legendre import _precompute_dlegpoly
+        from paddle_harmonics.legendre import legpoly
+
+        t = np.linspace(0, np.pi, 33)
+        x = np.cos(t)
+
+        # the vectorized recursions reproduce the reference loops exactly
+        vdm = legpoly(mmax, lmax, x, norm=norm, inverse=inverse, csphase=csphase)
+        vdm_ref = _legpoly_loop(mmax, lmax, x, norm=norm, inverse=inverse, csphase=csphase)
+        self.assertTrue(np.array_equal(vdm, vdm_ref))
+
+        dpct = _precompute_dlegpoly(mmax, lmax, t, norm=norm, inverse=inverse, csphase=csphase)
+        dpct_ref = _dlegpoly_loop(mmax, lmax, t, norm=norm, inverse=inverse, csphase=csphase)
+        self.assertTrue(np.array_equal(dpct, dpct_ref))
+
+
+class TestQuadrature(unittest.TestCase):
+    @parameterized.expand([[127], [128], [129], [256], [513]])
+    def test_legendre_gauss(self, n):
+        from paddle_harmonics.quadrature import legendre_gauss_weights
+
+        x, w = legendre_gauss_weights(n)
+        xref, wref = np.polynomial.legendre.leggauss(n)
+
+        self.assertTrue(np.allclose(x, xref, rtol=0, atol=1e-14))
+        self.assertTrue(np.allclose(w, wref, rtol=0, atol=1e-13))
+
+    @parameterized.expand(
+        [
+            [127, "legendre-gauss"],
+            [256, "legendre-gauss"],
+            [513, "legendre-gauss"],
+            [127, "lobatto"],
+            [128, "lobatto"],
+            [513, "lobatto"],
+        ]
+    )
+    def test_quadrature_exactness(self, n, rule):
+        from paddle_harmonics.quadrature import legendre_gauss_weights
+        from paddle_harmonics.quadrature import lobatto_weights
+
+        x, w = legendre_gauss_weights(n) if rule == "legendre-gauss" else lobatto_weights(n)
+        degree = 2 * n - 1 if rule == "legendre-gauss" else 2 * n - 3
+
+        self.assertTrue(np.all(np.diff(x) > 0))
+        # integrate Legendre polynomials up to the degree of exactness
+        vdm = np.polynomial.legendre.legvander(x, degree)
+        integrals = vdm.T @ w
+        self.assertTrue(abs(integrals[0] - 2.0) <= 1e-13)
+        self.assertTrue(np.abs(integrals[1:]).max() <= 1e-13)
+
 
 class TestSphericalHarmonicTransform(unittest.TestCase):
     def setUp(self):
@@ -185,6 +328,310 @@ class TestSphericalHarmonicTransform(unittest.TestCase):
         test_result = gradcheck(err_handle, grad_input, eps=1e-6, atol=tol)
         self.assertTrue(test_result)
 
+    @parameterized.expand(
+        [
+            [16, 32, 2, "equiangular", {}, 1e-12],
+            [17, 31, 2, "legendre-gauss", {"triangular": True}, 1e-12],
+            [17, 32, 2, "legendre-gauss", {"parity_split": True}, 1e-12],
+            [16, 32, 2, "lobatto", {"on_the_fly": True}, 1e-12],
+            [16, 32, 2, "equiangular", {"polar_threshold": 1e-8}, 1e-12],
+        ]
+    )
+    def test_sht_adjoint(self, nlat, nlon, batch_size, grid, kwargs, tol):
+        print(
+            f"Testing the adjoint based gradients of the SHT on {nlat}x{nlon} {grid} grid with {kwargs}"
+        )
+
+        def check(layer, x):
+            # compare the gradients of the layer to autograd of the transform itself
+            x.stop_gradient = False
+            y = (
+                paddle.as_real(layer(x))
+                if not layer.__class__.__name__.startswith("Inverse")
+                else layer(x)
+            )
+            w = paddle.randn(y.shape, dtype=y.dtype)
+            (grad,) = paddle.grad((y * w).sum(), x)
+
+            y = layer._forward_transform(x)
+            y = paddle.as_real(y) if y.is_complex() else y
+            (grad_ref,) = paddle.grad((y * w).sum(), x)
+
+            err = paddle.linalg.norm(grad - grad_ref) / paddle.linalg.norm(grad_ref)
+            self.assertTrue(err.item() <= tol)
+
+        sht = RealSHT(nlat, nlon, grid=grid, **kwargs).to(self.device)
+        isht = InverseRealSHT(nlat, nlon, grid=grid, **kwargs).to(self.device)
+        check(sht, paddle.randn([batch_size, nlat, nlon], dtype="float64"))
+        check(isht, sht(paddle.randn([batch_size, nlat, nlon], dtype="float64")))
+
+        kwargs = {k: v for k, v in kwargs.items() if k in ["triangular", "polar_threshold"]}
+        vsht = RealVectorSHT(nlat, nlon, grid=grid, **kwargs).to(self.device)
+        ivsht = InverseRealVectorSHT(nlat, nlon, grid=grid, **kwargs).to(self.device)
+        check(vsht, paddle.randn([batch_size, 2, nlat, nlon], dtype="float64"))
+        check(ivsht, vsht(paddle.randn([batch_size, 2, nlat, nlon], dtype="float64")))
+
+    @parameterized.expand(
+        [
+            [32, 64, 4, "ortho", "equiangular", 1e-12],
+            [33, 64, 4, "ortho", "legendre-gauss", 1e-12],
+            [33, 64, 4, "four-pi", "lobatto", 1e-12],
+            [32, 64, 4, "schmidt", "legendre-gauss", 1e-12],
+        ]
+    )
+    def test_sht_parity_split(self, nlat, nlon, batch_size, norm, grid, tol):
+        print(f"Testing parity split SHT on {nlat}x{nlon} {grid} grid with {norm} normalization")
+
+        sht = RealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        isht = InverseRealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        sht_split = RealSHT(nlat, nlon, grid=grid, norm=norm, parity_split=True).to(self.device)
+        isht_split = InverseRealSHT(nlat, nlon, grid=grid, norm=norm, parity_split=True).to(
+            self.device
+        )
+
+        signal = paddle.randn(shape=[batch_size, nlat, nlon], dtype="float64")
+        coeffs = sht(signal)
+        err = paddle.linalg.norm(sht_split(signal) - coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= tol)
+
+        ref = isht(coeffs)
+        err = paddle.linalg.norm(isht_split(coeffs) - ref) / paddle.linalg.norm(ref)
+        self.assertTrue(err.item() <= tol)
+
+    @parameterized.expand(
+        [
+            [32, 64, 4, "ortho", "equiangular", 1e-12],
+            [33, 64, 4, "four-pi", "legendre-gauss", 1e-12],
+            [33, 64, 4, "schmidt", "lobatto", 1e-12],
+            [32, 20, 4, "ortho", "legendre-gauss", 1e-12],
+        ]
+    )
+    def test_sht_on_the_fly(self, nlat, nlon, batch_size, norm, grid, tol):
+        print(f"Testing on-the-fly SHT on {nlat}x{nlon} {grid} grid with {norm} normalization")
+
+        sht = RealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        isht = InverseRealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        sht_otf = RealSHT(nlat, nlon, grid=grid, norm=norm, on_the_fly=True).to(self.device)
+        isht_otf = InverseRealSHT(nlat, nlon, grid=grid, norm=norm, on_the_fly=True).to(self.device)
+
+        signal = paddle.randn(shape=[batch_size, nlat, nlon], dtype="float64")
+        coeffs = sht(signal)
+        err = paddle.linalg.norm(sht_otf(signal) - coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= tol)
+
+        ref = isht(coeffs)
+        err = paddle.linalg.norm(isht_otf(coeffs) - ref) / paddle.linalg.norm(ref)
+        self.assertTrue(err.item() <= tol)
+
+    @parameterized.expand(
+        [
+            [32, 64, 4, "ortho", "equiangular", False, 1e-12],
+            [33, 64, 4, "ortho", "legendre-gauss", True, 1e-12],
+            [33, 64, 4, "schmidt", "lobatto", False, 1e-12],
+            [48, 96, 4, "four-pi", "legendre-gauss", True, 1e-12],
+        ]
+    )
+    def test_sht_triangular(self, nlat, nlon, batch_size, norm, grid, parity_split, tol):
+        print(f"Testing triangular SHT on {nlat}x{nlon} {grid} grid with {norm} normalization")
+
+        sht = RealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        isht = InverseRealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        sht_tri = RealSHT(
+            nlat, nlon, grid=grid, norm=norm, parity_split=parity_split, triangular=True
+        ).to(self.device)
+        isht_tri = InverseRealSHT(
+            nlat, nlon, grid=grid, norm=norm, parity_split=parity_split, triangular=True
+        ).to(self.device)
+
+        signal = paddle.randn(shape=[batch_size, nlat, nlon], dtype="float64")
+        coeffs = sht(signal)
+        err = paddle.linalg.norm(sht_tri(signal) - coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= tol)
+
+        ref = isht(coeffs)
+        err = paddle.linalg.norm(isht_tri(coeffs) - ref) / paddle.linalg.norm(ref)
+        self.assertTrue(err.item() <= tol)
+
+        vsht = RealVectorSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        ivsht = InverseRealVectorSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        vsht_tri = RealVectorSHT(nlat, nlon, grid=grid, norm=norm, triangular=True).to(self.device)
+        ivsht_tri = InverseRealVectorSHT(nlat, nlon, grid=grid, norm=norm, triangular=True).to(
+            self.device
+        )
+
+        signal = paddle.randn(shape=[batch_size, 2, nlat, nlon], dtype="float64")
+        coeffs = vsht(signal)
+        err = paddle.linalg.norm(vsht_tri(signal) - coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= tol)
+
+        ref = ivsht(coeffs)
+        err = paddle.linalg.norm(ivsht_tri(coeffs) - ref) / paddle.linalg.norm(ref)
+        self.assertTrue(err.item() <= tol)
+
+    @parameterized.expand(
+        [
+            [64, 128, 4, "ortho", "legendre-gauss", False, 1e-10],
+            [65, 128, 4, "ortho", "equiangular", True, 1e-10],
+            [64, 128, 4, "schmidt", "lobatto", False, 1e-6],
+        ]
+    )
+    def test_sht_polar_threshold(self, nlat, nlon, batch_size, norm, grid, parity_split, threshold):
+        print(
+            f"Testing polar optimized SHT on {nlat}x{nlon} {grid} grid with threshold {threshold}"
+        )
+
+        sht = RealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        isht = InverseRealSHT(nlat, nlon, grid=grid, norm=norm).to(self.device)
+        sht_polar = RealSHT(
+            nlat, nlon, grid=grid, norm=norm, parity_split=parity_split, polar_threshold=threshold
+        ).to(self.device)
+        isht_polar = InverseRealSHT(
+            nlat, nlon, grid=grid, norm=norm, parity_split=parity_split, polar_threshold=threshold
+        ).to(self.device)
+
+        # the reported error has to be meaningful, but not larger than the threshold suggests
+        self.assertTrue(0.0 < sht_polar.polar_error <= 100 * threshold)
+        self.assertTrue(0.0 < isht_polar.polar_error <= 100 * threshold)
+
+        signal = paddle.randn(shape=[batch_size, nlat, nlon], dtype="float64")
+        coeffs = sht(signal)
+        err = paddle.linalg.norm(sht_polar(signal) - coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= 100 * threshold)
+
+        ref = isht(coeffs)
+        err = paddle.linalg.norm(isht_polar(coeffs) - ref) / paddle.linalg.norm(ref)
+        self.assertTrue(err.item() <= 100 * threshold)
+
+    def test_sht_weight_cast(self):
+        sht = RealSHT(32, 64, grid="equiangular").to(self.device)
+        signal = paddle.randn(shape=[4, 32, 64], dtype="float32")
+        coeffs = sht(signal)
+
+        # the float32 copy of the weights is reused across calls
+        cast_weights = sht._cast_cache[("weights", paddle.float32)][1]
+        sht(signal)
+        self.assertTrue(sht._cast_cache[("weights", paddle.float32)][1] is cast_weights)
+
+        # and refreshed once the weights change
+        sht.weights = 2.0 * sht.weights
+        err = paddle.linalg.norm(sht(signal) - 2.0 * coeffs) / paddle.linalg.norm(coeffs)
+        self.assertTrue(err.item() <= 1e-6)
+
+    def test_vector_sht_batch_dims(self):
+        vsht = RealVectorSHT(16, 32, grid="equiangular").to(self.device)
+        ivsht = InverseRealVectorSHT(16, 32, grid="equiangular").to(self.device)
+        signal = paddle.randn(shape=[2, 3, 2, 16, 32], dtype="float64")
+
+        # several batch dimensions give the same result as transforming each field separately
+        coeffs = vsht(signal)
+        ref = vsht(signal.reshape([6, 2, 16, 32])).reshape(coeffs.shape)
+        self.assertTrue(paddle.allclose(paddle.as_real(coeffs), paddle.as_real(ref)).item())
+        self.assertEqual(ivsht(coeffs).shape, signal.shape)
+
+    def test_precompute_cache(self):
+        cache.clear_cache()
+        sht = RealSHT(32, 64, grid="equiangular")
+        misses = cache.cache_info().misses
+
+        # a second transform with the same configuration must not recompute anything
+        sht_again = RealSHT(32, 64, grid="equiangular")
+        info = cache.cache_info()
+        self.assertEqual(info.misses, misses)
+        self.assertTrue(info.hits >= 2)
+        self.assertTrue(paddle.equal_all(sht.weights, sht_again.weights).item())
+
+        # casting the buffers of one layer must leave the cached weights untouched
+        sht.to(dtype="float32")
+        self.assertEqual(sht_again.weights.dtype, paddle.float64)
+
+        # shrinking the budget evicts the least recently used entries
+        cache.set_cache_budget(0)
+        info = cache.cache_info()
+        self.assertEqual(info.entries, 0)
+        self.assertEqual(info.nbytes, 0)
+        cache.set_cache_budget(2**31)
+
+    def test_precompute_cache_blocks(self):
+        cache.clear_cache()
+        sht = RealSHT(64, 128, grid="equiangular", parity_split=True, triangular=True)
+
+        # only the blocks used by the layer are cached, not the dense weights they are built from
+        key = ("RealSHT", 64, sht.lmax, sht.mmax, sht.grid, sht.norm, sht.csphase)
+        self.assertNotIn(key, cache._precompute_cache._entries)
+        nbytes = sum(int(np.prod(b.shape)) * b.element_size() for b in sht.buffers())
+        nbytes += cache._precompute_cache._entries[("quadrature", "equiangular", 64)][1]
+        self.assertTrue(cache.cache_info().nbytes <= nbytes)
+
+    def test_precompute_cache_threads(self):
+        cache.clear_cache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_compute():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=10)
+            return np.zeros(4)
+
+        def lookup():
+            cache.cached(("slow",), slow_compute)
+
+        threads = [threading.Thread(target=lookup) for _ in range(2)]
+        threads[0].start()
+        started.wait(timeout=10)
+        threads[1].start()
+
+        # a slow precomputation does not block lookups of other keys
+        self.assertEqual(cache.cached(("fast",), lambda: 1), 1)
+        self.assertFalse(release.is_set())
+
+        # concurrent lookups of the same key wait for a single computation
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual(len(calls), 1)
+        cache.clear_cache()
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache.set_cache_dir(cache_dir)
+            try:
+                cache.clear_cache()
+                sht = RealSHT(32, 64, grid="legendre-gauss")
+                self.assertTrue(len(os.listdir(cache_dir)) > 0)
+
+                # a fresh process only finds the tensors on disk
+                cache.clear_cache()
+                sht_disk = RealSHT(32, 64, grid="legendre-gauss")
+                self.assertEqual(sht_disk.weights.dtype, sht.weights.dtype)
+                self.assertTrue(paddle.equal_all(sht.weights, sht_disk.weights).item())
+
+                # tensors wrap the memory-mapped files instead of being copied
+                key = ("RealSHT", 32, sht.lmax, sht.mmax, sht.grid, sht.norm, sht.csphase)
+                with mock.patch.object(cache.paddle, "to_tensor", side_effect=AssertionError):
+                    weights = cache._load_or_compute(cache_dir, key, None)
+                self.assertTrue(paddle.equal_all(weights, sht_disk.weights).item())
+
+                # blocked weights are stored on disk in place of the dense weights
+                cache.clear_cache()
+                isht = InverseRealSHT(
+                    32, 64, grid="legendre-gauss", parity_split=True, triangular=True
+                )
+                cache.clear_cache()
+                isht_disk = InverseRealSHT(
+                    32, 64, grid="legendre-gauss", parity_split=True, triangular=True
+                )
+                for (name, buf), buf_disk in zip(isht.named_buffers(), isht_disk.buffers()):
+                    self.assertTrue(paddle.equal_all(buf, buf_disk).item(), name)
+
+                # entries of a different cache revision are not picked up
+                with mock.patch.object(cache, "CACHE_REVISION", cache.CACHE_REVISION + 1):
+                    self.assertFalse(os.path.exists(cache._cache_path(cache_dir, key)))
+            finally:
+                cache.set_cache_dir(None)
+                cache.clear_cache()
+
 
 if __name__ == "__main__":
     unittest.main()